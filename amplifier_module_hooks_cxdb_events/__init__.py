@@ -14,7 +14,13 @@ Usage in bundle config:
 from __future__ import annotations
 
 import logging
-from fnmatch import fnmatch
+import os
+import re
+import sys
+from collections.abc import Collection
+from fnmatch import translate
+from functools import lru_cache
+from itertools import chain
 from typing import Any
 
 from amplifier_core.events import ALL_EVENTS
@@ -27,27 +33,77 @@ logger = logging.getLogger(__name__)
 # Default events to exclude (high-frequency streaming noise)
 DEFAULT_EXCLUDES = frozenset({"content_block:delta", "thinking:delta"})
 
+# Canonical kernel events, interned so set lookups against them hit the
+# identity fast path
+_CANONICAL_EVENTS = tuple(sys.intern(e) for e in ALL_EVENTS)
+
 # Module-specific events not in ALL_EVENTS but discoverable at runtime
-_KNOWN_MODULE_EVENTS = [
+_KNOWN_MODULE_EVENTS = (
     "task:agent_spawned",
     "task:agent_completed",
     "task:agent_resumed",
-]
+)
+
+
+# Characters that make an exclude pattern a glob rather than an exact name
+_GLOB_CHARS = frozenset("*?[")
+
 
+def _compile_exclude_patterns(
+    exclude_patterns: Collection[str],
+) -> tuple[frozenset[str], re.Pattern[str] | None]:
+    """Split exclude patterns into exact names and one compiled glob regex.
+
+    All glob patterns are translated once and alternated into a single
+    regex, so filtering N events costs N regex matches instead of
+    N * P fnmatch calls.
+
+    Args:
+        exclude_patterns: Exact names or glob patterns.
 
-def _should_exclude(event: str, exclude_patterns: set[str]) -> bool:
+    Returns:
+        Tuple of (exact_names, glob_regex). glob_regex is None if there
+        are no glob patterns.
+    """
+    exact = frozenset(p for p in exclude_patterns if _GLOB_CHARS.isdisjoint(p))
+    globs = [translate(p) for p in exclude_patterns if p not in exact]
+    glob_re = re.compile("|".join(globs)) if globs else None
+    return exact, glob_re
+
+
+def _should_exclude(
+    event: str, exact: frozenset[str], glob_re: re.Pattern[str] | None
+) -> bool:
     """Check if an event should be excluded by exact match or glob pattern.
 
     Args:
         event: Event name to check.
-        exclude_patterns: Set of exact names or glob patterns.
+        exact: Exact event names to exclude.
+        glob_re: Compiled glob patterns from _compile_exclude_patterns().
 
     Returns:
         True if the event should be excluded.
     """
-    if event in exclude_patterns:
+    if event in exact:
         return True
-    return any(fnmatch(event, pattern) for pattern in exclude_patterns)
+    return glob_re is not None and glob_re.match(event) is not None
+
+
+@lru_cache(maxsize=256)
+def _client_tag(root_session_id: str) -> tuple[str, str]:
+    """Derive the project name and CXDB client_tag for a root session.
+
+    Cached per root session so sub-agents spawned in the same process
+    don't repeat the getcwd() call and string building on every mount.
+
+    Args:
+        root_session_id: Root session ID of the mounting session.
+
+    Returns:
+        Tuple of (project_name, client_tag).
+    """
+    project_name = os.path.basename(os.getcwd())
+    return project_name, f"amplifier - {project_name} - {root_session_id[:12]}"
 
 
 async def mount(coordinator: Any, config: dict[str, Any]) -> Any:
@@ -74,32 +130,35 @@ async def mount(coordinator: Any, config: dict[str, Any]) -> Any:
 
     # Build the event list
     # Layer 1: All canonical kernel events
-    events: list[str] = list(ALL_EVENTS)
-
     # Layer 2: Known module-specific events
-    events.extend(_KNOWN_MODULE_EVENTS)
-
     # Layer 3: Discovered module events via contribution channel
+    contributed: list[list[str]] = []
     try:
         contributions = await coordinator.collect_contributions("observability.events")
-        for contribution in contributions:
-            if isinstance(contribution, list):
-                events.extend(contribution)
+        contributed = [c for c in contributions if isinstance(c, list)]
     except Exception as e:
         logger.debug(f"Failed to collect observability.events contributions: {e}")
 
     # Layer 4: Additional events from config
     additional = config.get("additional_events", [])
-    if additional:
-        events.extend(additional)
-
-    # Deduplicate
-    events = list(dict.fromkeys(events))
 
-    # Apply exclusion filter
-    user_excludes = set(config.get("exclude_events", []))
-    exclude_patterns: set[str] = set(DEFAULT_EXCLUDES) | user_excludes
-    events = [e for e in events if not _should_exclude(e, exclude_patterns)]
+    # Exclusion filter
+    exclude_patterns = DEFAULT_EXCLUDES.union(
+        map(sys.intern, config.get("exclude_events", []))
+    )
+    exact, glob_re = _compile_exclude_patterns(exclude_patterns)
+
+    # Deduplicate (first occurrence wins) and filter in a single pass
+    seen: set[str] = set()
+    events: list[str] = []
+    for event in chain(
+        _CANONICAL_EVENTS, _KNOWN_MODULE_EVENTS, *contributed, additional
+    ):
+        if event in seen:
+            continue
+        seen.add(event)
+        if not _should_exclude(event, exact, glob_re):
+            events.append(event)
 
     # Get session info from coordinator
     session_id = coordinator.session_id
@@ -112,15 +171,16 @@ async def mount(coordinator: Any, config: dict[str, Any]) -> Any:
     # Note: the CLI does NOT put project_name or bundle_name into
     # coordinator.config (only root_session_id is set there). We derive
     # project name from cwd, matching how the CLI scopes sessions.
-    import os
-
-    project_name = os.path.basename(os.getcwd())
-    tag_parts = ["amplifier", project_name, root_session_id[:12]]
-    client_tag = " - ".join(tag_parts)
+    project_name, client_tag = _client_tag(root_session_id)
 
     # Create the TCP client and hook
     client = CXDBTcpClient(
-        host=cxdb_host, port=cxdb_port, timeout=timeout, client_tag=client_tag
+        host=cxdb_host,
+        port=cxdb_port,
+        timeout=timeout,
+        client_tag=client_tag,
+        tcp_nodelay=config.get("tcp_nodelay", True),
+        sndbuf_bytes=config.get("socket_sndbuf_bytes", 1 << 20),
     )
 
     # Stash project info into config for context_metadata in hook.initialize()
@@ -147,7 +207,7 @@ async def mount(coordinator: Any, config: dict[str, Any]) -> Any:
         registrations.append(reg)
 
     logger.info(
-        f"hooks-cxdb-events: registered {len(registrations)} events "
+        f"hooks-cxdb-events: registered {len(events)} events "
         f"(priority={priority}, host={cxdb_host}:{cxdb_port})"
     )
 
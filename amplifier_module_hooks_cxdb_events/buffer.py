@@ -1,47 +1,84 @@
-"""EventBuffer - in-memory deque with configurable max size and piggyback retry."""
+"""EventBuffer - fixed-size in-memory ring buffer with piggyback retry."""
 
 from __future__ import annotations
 
-import collections
 import logging
-from typing import Awaitable, Callable
+import time
+from typing import Awaitable, Callable, Literal
 
 logger = logging.getLogger(__name__)
 
 # Type alias for the send function signature
 SendFn = Callable[[int, bytes, str, int], Awaitable[tuple[int, int]]]
 
+# Type alias for the multi-context send function signature:
+# [(context_id, payload, type_id, type_version), ...] -> [(turn_id, depth), ...]
+ManySendFn = Callable[
+    [list[tuple[int, bytes, str, int]]], Awaitable[list[tuple[int, int]]]
+]
+
+OverflowPolicy = Literal["drop_oldest", "drop_newest"]
+
+# Minimum seconds between overflow warnings, so a burst logs once
+_OVERFLOW_LOG_INTERVAL = 10.0
+
 
 class EventBuffer:
     """In-memory buffer for CXDB events with configurable max size.
 
     When CXDB is unreachable, events queue in the buffer. On each new event,
     the buffer attempts to flush all queued events first (piggyback retry).
-    When the buffer exceeds max size, oldest events are dropped automatically.
-
-    Each buffered item is a tuple of:
-        (context_id, msgpack_bytes, declared_type_id, declared_type_version)
+    When the buffer exceeds max size, events are dropped according to the
+    overflow policy: "drop_oldest" (default) keeps a sliding window of the most
+    recent events, "drop_newest" keeps the session's earliest events and
+    discards new ones.
+
+    Storage is a fixed-size ring of four parallel slot lists (context_id,
+    payload, declared_type_id, declared_type_version) allocated once
+    up front, so enqueueing an event does not allocate a per-event tuple.
+    Payload bytes are stored by reference, never copied.
     """
 
-    def __init__(self, max_size: int = 1000) -> None:
+    def __init__(
+        self, max_size: int = 1000, overflow_policy: OverflowPolicy = "drop_oldest"
+    ) -> None:
         """Initialize the event buffer.
 
         Args:
             max_size: Maximum number of events to buffer. When exceeded,
-                      oldest events are dropped automatically.
+                      events are dropped according to overflow_policy.
+            overflow_policy: "drop_oldest" or "drop_newest".
+
+        Raises:
+            ValueError: If max_size is negative or overflow_policy is not a
+                        known policy.
         """
-        self._buffer: collections.deque[tuple[int, bytes, str, int]] = (
-            collections.deque(maxlen=max_size)
-        )
+        if max_size < 0:
+            raise ValueError(f"max_size must be >= 0, got {max_size}")
+        if overflow_policy not in ("drop_oldest", "drop_newest"):
+            raise ValueError(f"Unknown overflow policy: {overflow_policy!r}")
         self._max_size = max_size
+        self._drop_newest = overflow_policy == "drop_newest"
+        # Slot lists are sized to the next power of two so indices wrap with
+        # a mask instead of a modulo; at most max_size slots are ever in use.
+        capacity = 1 << max(max_size - 1, 0).bit_length()
+        self._mask = capacity - 1
+        self._context_ids: list[int] = [0] * capacity
+        self._payloads: list[bytes | None] = [None] * capacity
+        self._type_ids: list[str] = [""] * capacity
+        self._type_versions: list[int] = [0] * capacity
+        self._head: int = 0  # slot of the oldest buffered event
+        self._head_seq: int = 0  # events ever removed from the front
+        self._count: int = 0
         self._overflow_count: int = 0
+        self._last_overflow_log: float | None = None
         self._total_enqueued: int = 0
         self._total_sent: int = 0
 
     @property
     def size(self) -> int:
         """Current number of buffered events."""
-        return len(self._buffer)
+        return self._count
 
     @property
     def max_size(self) -> int:
@@ -72,28 +109,40 @@ class EventBuffer:
     ) -> None:
         """Add an event to the buffer.
 
-        If the buffer is full, the oldest event is dropped automatically
-        (deque maxlen behavior).
+        If the buffer is full, either the oldest event is dropped (its slot
+        is overwritten by the new event) or, with the "drop_newest" policy,
+        the new event is discarded.
 
         Args:
             context_id: Target CXDB context ID.
-            payload: Pre-serialized msgpack bytes.
+            payload: Pre-serialized turn bytes, passed to the send function as-is.
             declared_type_id: CXDB type identifier.
             declared_type_version: CXDB type version.
         """
-        was_full = len(self._buffer) == self._max_size
-        self._buffer.append(
-            (context_id, payload, declared_type_id, declared_type_version)
-        )
         self._total_enqueued += 1
 
-        if was_full:
+        if self._count == self._max_size:
             self._overflow_count += 1
-            if self._overflow_count == 1 or self._overflow_count % 100 == 0:
+            now = time.monotonic()
+            if (
+                self._last_overflow_log is None
+                or now - self._last_overflow_log >= _OVERFLOW_LOG_INTERVAL
+            ):
+                self._last_overflow_log = now
                 logger.warning(
                     f"Event buffer overflow: {self._overflow_count} events dropped "
                     f"(buffer size: {self._max_size})"
                 )
+            if self._drop_newest or self._max_size == 0:
+                return
+            self._pop_oldest()
+
+        slot = (self._head + self._count) & self._mask
+        self._context_ids[slot] = context_id
+        self._payloads[slot] = payload
+        self._type_ids[slot] = declared_type_id
+        self._type_versions[slot] = declared_type_version
+        self._count += 1
 
     async def flush(self, send_fn: SendFn) -> int:
         """Attempt to send all buffered events via the send function.
@@ -109,11 +158,17 @@ class EventBuffer:
             Number of events successfully sent.
         """
         sent = 0
-        while self._buffer:
-            context_id, payload, type_id, type_version = self._buffer[0]
+        while self._count:
+            slot = self._head
+            start_seq = self._head_seq
             try:
-                await send_fn(context_id, payload, type_id, type_version)
-                self._buffer.popleft()
+                await send_fn(
+                    self._context_ids[slot],
+                    self._payloads[slot],  # type: ignore[arg-type]
+                    self._type_ids[slot],
+                    self._type_versions[slot],
+                )
+                self._pop_sent(start_seq, 1)
                 sent += 1
                 self._total_sent += 1
             except Exception:
@@ -123,14 +178,71 @@ class EventBuffer:
                 else:
                     logger.debug(
                         f"Buffer flush stopped after {sent} events, "
-                        f"{len(self._buffer)} remaining"
+                        f"{self._count} remaining"
                     )
                 break
         return sent
 
+    async def flush_many(self, send_many_fn: ManySendFn) -> int:
+        """Attempt to send every buffered event in a single call.
+
+        Events for every context go out together, so the whole buffer costs
+        one network write. On failure all events stay in the buffer for retry.
+
+        Args:
+            send_many_fn: Async callable with signature
+                          ([(context_id, payload, type_id, type_version), ...])
+                          -> [(turn_id, depth), ...]
+
+        Returns:
+            Number of events successfully sent.
+        """
+        count = self._count
+        if not count:
+            return 0
+        start_seq = self._head_seq
+        turns: list[tuple[int, bytes, str, int]] = []
+        for i in range(count):
+            slot = (self._head + i) & self._mask
+            turns.append(
+                (
+                    self._context_ids[slot],
+                    self._payloads[slot],  # type: ignore[arg-type]
+                    self._type_ids[slot],
+                    self._type_versions[slot],
+                )
+            )
+        try:
+            await send_many_fn(turns)
+        except Exception:
+            logger.debug(f"Buffer flush failed, {self._count} events kept for retry")
+            return 0
+        self._pop_sent(start_seq, count)
+        self._total_sent += count
+        return count
+
     def clear(self) -> None:
         """Clear all buffered events."""
-        self._buffer.clear()
+        while self._count:
+            self._pop_oldest()
+        self._head = 0
+
+    def _pop_oldest(self) -> None:
+        """Drop the oldest buffered event, releasing its payload."""
+        self._payloads[self._head] = None
+        self._head = (self._head + 1) & self._mask
+        self._head_seq += 1
+        self._count -= 1
+
+    def _pop_sent(self, start_seq: int, sent: int) -> None:
+        """Drop events start_seq .. start_seq + sent - 1 after they were sent.
+
+        An overflow or clear() while the send was awaited may already have
+        dropped some of them; those are skipped, so events enqueued during the
+        send are never popped in their place.
+        """
+        for _ in range(start_seq + sent - self._head_seq):
+            self._pop_oldest()
 
     def __repr__(self) -> str:
         return (
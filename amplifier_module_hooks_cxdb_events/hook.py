@@ -2,36 +2,72 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Any
+import time
+from functools import partial
+from types import MethodType
+from typing import Any, Callable, ClassVar
 
 from amplifier_module_hooks_cxdb_events.buffer import EventBuffer
-from amplifier_module_hooks_cxdb_events.protocol import CXDBTcpClient
+from amplifier_module_hooks_cxdb_events.protocol import (
+    CXDBTcpClient,
+    encode_append_turn,
+    pack_payload,
+)
 from amplifier_module_hooks_cxdb_events.schema import (
     build_context_metadata,
     build_event_as_system_item,
     extract_agent_name,
     publish_registry_bundle,
-    serialize_envelope,
 )
 from amplifier_module_hooks_cxdb_events.turns import TurnAccumulator
 from amplifier_module_hooks_cxdb_events.types import VariantDeduplicator
 
+try:
+    from amplifier_core.models import HookResult
+    from pydantic import ConfigDict
+
+    class _FrozenHookResult(HookResult):
+        """HookResult that rejects mutation, so one instance can be shared."""
+
+        model_config = ConfigDict(frozen=True)
+
+except ImportError:
+    # Fallback for testing without amplifier-core
+    class HookResult:  # type: ignore[no-redef]
+        __slots__ = ("action",)
+
+        def __init__(self, action: str = "continue") -> None:
+            object.__setattr__(self, "action", action)
+
+        def __setattr__(self, name: str, value: Any) -> None:
+            raise AttributeError(f"HookResult is immutable: cannot set {name!r}")
+
+    _FrozenHookResult = HookResult  # type: ignore[misc]
+
+
 logger = logging.getLogger(__name__)
 
-# Events that feed the turn accumulator (for the turns context)
-_TURN_EVENTS = frozenset(
-    {
-        "prompt:submit",
-        "content_block:end",
-        "tool:pre",
-        "tool:post",
-        "provider:request",
-        "provider:response",
-        "orchestrator:complete",
-        "execution:end",
-    }
-)
+# Minimum seconds between queue-full warnings, so a burst logs once
+_DROP_LOG_INTERVAL = 10.0
+
+# Every code path of handle_event returns "continue", so one frozen instance
+# is shared; mutating it raises instead of leaking into later events.
+_CONTINUE: HookResult = _FrozenHookResult(action="continue")
+
+# Turn accumulator handler for each event that feeds the turns context.
+# orchestrator:complete also belongs to the turn lifecycle, but it triggers
+# _flush_turns() in handle_event rather than an accumulator handler.
+_TURN_DISPATCH: dict[str, Callable[[TurnAccumulator, dict[str, Any]], None]] = {
+    "prompt:submit": TurnAccumulator.on_prompt_submit,
+    "content_block:end": TurnAccumulator.on_content_block_end,
+    "tool:pre": TurnAccumulator.on_tool_pre,
+    "tool:post": TurnAccumulator.on_tool_post,
+    "provider:request": TurnAccumulator.on_provider_request,
+    "provider:response": TurnAccumulator.on_provider_response,
+    "execution:end": lambda acc, _data: acc.on_execution_end(),
+}
 
 
 class CXDBEventHook:
@@ -41,10 +77,16 @@ class CXDBEventHook:
     - Dual CXDB contexts (turns + everything) per root session
     - Event routing to turn accumulator and/or everything context
     - Variant deduplication (:raw > :debug > base)
+    - A single background writer task that batches all CXDB writes
     - Buffered retry when CXDB is unreachable
     - Graceful degradation (never crashes the session)
     """
 
+    # Registry targets (host, http_port) already published by this process, and
+    # publishes in flight, so concurrent hooks share a single PUT per target.
+    _published_registries: ClassVar[set[tuple[str, int]]] = set()
+    _registry_publishes: ClassVar[dict[tuple[str, int], asyncio.Future[bool]]] = {}
+
     def __init__(
         self,
         client: CXDBTcpClient,
@@ -61,16 +103,55 @@ class CXDBEventHook:
         self._root_session_id = root_session_id
         self._is_root = parent_id is None
         self._agent_name = extract_agent_name(session_id)
+        # Session fields are fixed for the hook's lifetime; bind them once
+        self._build_system_item = partial(
+            build_event_as_system_item,
+            session_id=session_id,
+            parent_session_id=parent_id,
+            agent_name=self._agent_name,
+            root_session_id=root_session_id,
+        )
 
         # CXDB context IDs (set during initialize)
         self._turns_context_id: int | None = None
         self._everything_context_id: int | None = None
 
         # Components
-        self._buffer = EventBuffer(max_size=config.get("buffer_size", 1000))
+        buffer_size = config.get("buffer_size", 1000)
+        overflow_policy = config.get("overflow_policy", "drop_oldest")
+        self._buffer = EventBuffer(
+            max_size=buffer_size, overflow_policy=overflow_policy
+        )
         self._turn_accumulator = TurnAccumulator()
+        # Turn handlers pre-bound to this hook's accumulator, so routing an
+        # event is one dict lookup and a direct call.
+        self._turn_handlers: dict[str, Callable[[dict[str, Any]], None]] = {
+            event: MethodType(handler, self._turn_accumulator)
+            for event, handler in _TURN_DISPATCH.items()
+        }
+        # Per-event routing decisions, computed the first time each event name
+        # is seen: (passes variant dedup, turn handler or None, flushes turns)
+        self._routes: dict[
+            str, tuple[bool, Callable[[dict[str, Any]], None] | None, bool]
+        ] = {}
         self._variant_dedup = VariantDeduplicator(known_events=known_events)
 
+        # Writes are queued as (context_id, msgpack_bytes, type_id, type_version)
+        # and sent by one writer task, so handle_event never waits on the network.
+        # The writer sends up to batch_max_events turns per write, waiting
+        # batch_max_delay_ms for more to arrive when the queue is short.
+        # The queue shares buffer_size and overflow_policy with the buffer, but
+        # holds at least one turn: asyncio treats maxsize 0 as unbounded.
+        self._queue: asyncio.Queue[tuple[int, bytes, str, int]] = asyncio.Queue(
+            maxsize=max(buffer_size, 1)
+        )
+        self._queue_drops_oldest = overflow_policy == "drop_oldest"
+        self._writer_task: asyncio.Task[None] | None = None
+        self._batch_max_events: int = config.get("batch_max_events", 64)
+        self._batch_max_delay: float = config.get("batch_max_delay_ms", 2) / 1000
+        self._dropped_count: int = 0
+        self._last_drop_log: float | None = None
+
         # State
         self._initialized = False
         self._registry_published = False
@@ -85,6 +166,11 @@ class CXDBEventHook:
         """Whether the hook has been initialized (connected + contexts created)."""
         return self._initialized
 
+    @property
+    def dropped_count(self) -> int:
+        """Number of events dropped because the write queue was full."""
+        return self._dropped_count
+
     @property
     def turns_context_id(self) -> int | None:
         return self._turns_context_id
@@ -109,45 +195,47 @@ class CXDBEventHook:
             if not self._client.connected:
                 await self._client.connect()
 
-            # Publish registry bundle (HTTP, idempotent)
-            if not self._registry_published:
-                http_port = self._config.get("cxdb_http_port", 80)
-                published = await publish_registry_bundle(self._client.host, http_port)
-                if published:
-                    self._registry_published = True
-                    logger.info("CXDB registry bundle published")
-                else:
-                    logger.warning(
-                        "Failed to publish registry bundle, continuing anyway"
-                    )
-
             # Create contexts and write context_metadata as first turn.
+            # The registry publish (HTTP) runs concurrently with context
+            # creation (one pipelined TCP write for both contexts).
             # TODO: child sessions should fork from parent via _SESSION_REGISTRY
             # instead of creating independent contexts.
             project_name = self._config.get("_project_name", "")
             spawn_reason = "root" if self._is_root else "delegate"
 
-            self._turns_context_id, _, _ = await self._client.create_context()
-            self._everything_context_id, _, _ = await self._client.create_context()
+            _, contexts = await asyncio.gather(
+                self._publish_registry(),
+                self._client.create_contexts(2),
+            )
+            (self._turns_context_id, _, _), (self._everything_context_id, _, _) = (
+                contexts
+            )
 
-            # Write context_metadata as first turn to each context.
+            # Write context_metadata as first turn to each context, both in one write.
             # CXDB extracts tag 30 to populate title, labels, and provenance in the UI.
-            for ctx_id, label in [
-                (self._turns_context_id, "Turns"),
-                (self._everything_context_id, "Events"),
-            ]:
-                metadata_item = build_context_metadata(
-                    session_id=self._session_id,
-                    context_label=label,
-                    client_tag=self._client.client_tag,
-                    project_name=project_name,
-                    agent_name=self._agent_name or "",
-                    bundle_name="",
-                    spawn_reason=spawn_reason,
-                )
-                await self._write_turn(
-                    ctx_id, metadata_item, "cxdb.ConversationItem", type_version=3
+            metadata_turns = [
+                (
+                    ctx_id,
+                    pack_payload(
+                        build_context_metadata(
+                            session_id=self._session_id,
+                            context_label=label,
+                            client_tag=self._client.client_tag,
+                            project_name=project_name,
+                            agent_name=self._agent_name or "",
+                            bundle_name="",
+                            spawn_reason=spawn_reason,
+                        )
+                    ),
+                    "cxdb.ConversationItem",
+                    3,
                 )
+                for ctx_id, label in [
+                    (self._turns_context_id, "Turns"),
+                    (self._everything_context_id, "Events"),
+                ]
+            ]
+            await self._write_batch(metadata_turns)
 
             logger.info(
                 f"Created CXDB contexts: turns={self._turns_context_id}, "
@@ -160,6 +248,44 @@ class CXDBEventHook:
             logger.warning(f"CXDB initialization failed: {e}")
             # Don't set _initialized -- will retry on next event
 
+    async def _publish_registry(self) -> None:
+        """Publish the registry bundle (HTTP, idempotent) once per process and target.
+
+        Never raises; a failed publish is retried on the next initialize().
+        """
+        if self._registry_published:
+            return
+
+        cls = CXDBEventHook
+        target = (self._client.host, self._config.get("cxdb_http_port", 80))
+        if target in cls._published_registries:
+            self._registry_published = True
+            return
+
+        publish = cls._registry_publishes.get(target)
+        if publish is None or publish.get_loop() is not asyncio.get_running_loop():
+            publish = asyncio.ensure_future(publish_registry_bundle(*target))
+            cls._registry_publishes[target] = publish
+
+            def _forget(done: asyncio.Future[bool]) -> None:
+                if cls._registry_publishes.get(target) is done:
+                    del cls._registry_publishes[target]
+
+            publish.add_done_callback(_forget)
+
+        try:
+            published = await asyncio.shield(publish)
+        except Exception as e:
+            logger.warning(f"Failed to publish registry bundle: {e}")
+            return
+
+        if published:
+            cls._published_registries.add(target)
+            self._registry_published = True
+            logger.info("CXDB registry bundle published")
+        else:
+            logger.warning("Failed to publish registry bundle, continuing anyway")
+
     async def handle_event(self, event: str, data: dict[str, Any]) -> Any:
         """Main event handler. Routes events to accumulator, buffer, and contexts.
 
@@ -171,45 +297,52 @@ class CXDBEventHook:
             data: Event data dict (includes session_id, parent_id via hook defaults).
 
         Returns:
-            HookResult(action="continue") -- never blocks.
+            The shared HookResult(action="continue") -- never blocks.
         """
-        # Import here to avoid circular dependency issues during testing
-        try:
-            from amplifier_core.models import HookResult
-        except ImportError:
-            # Fallback for testing without amplifier-core
-            class HookResult:  # type: ignore[no-redef]
-                def __init__(self, action: str = "continue") -> None:
-                    self.action = action
-
         try:
             # Lazy initialization on first event
             if not self._initialized:
                 await self.initialize()
 
-            # Variant deduplication
-            if not self._variant_dedup.should_process(event):
-                return HookResult(action="continue")
+            self._dispatch(event, data)
+
+        except Exception as e:
+            logger.debug(f"Error handling event {event}: {e}")
 
-            # Straggler suppression
-            if self._turn_accumulator.is_straggler(event):
-                return HookResult(action="continue")
+        return _CONTINUE
 
-            # Route to turn accumulator for turn-related events
-            if event in _TURN_EVENTS:
-                self._handle_turn_event(event, data)
+    def _dispatch(self, event: str, data: dict[str, Any]) -> None:
+        """Route one event to the turn accumulator and the write queue.
 
-            # Write to everything context (all events)
-            await self._write_to_everything_context(event, data)
+        Synchronous steady-state path of handle_event(): nothing here awaits,
+        so an event is fully routed and queued without yielding to the loop.
+        Exceptions propagate to handle_event(), which logs and swallows them.
+        """
+        process, turn_handler, flushes_turns = self._routes.get(
+            event
+        ) or self._route(event)
 
-            # Flush turns on orchestrator:complete
-            if event == "orchestrator:complete":
-                await self._flush_turns()
+        # Variant deduplication
+        if not process:
+            return
 
-        except Exception as e:
-            logger.debug(f"Error handling event {event}: {e}")
+        # Straggler suppression
+        if self._turn_accumulator.is_straggler(event):
+            return
 
-        return HookResult(action="continue")
+        if self._writer_task is None:
+            self._writer_task = asyncio.create_task(self._writer_loop())
+
+        # Route to turn accumulator for turn-related events
+        if turn_handler is not None:
+            turn_handler(data)
+
+        # Write to everything context (all events)
+        self._write_to_everything_context(event, data)
+
+        # Flush turns on orchestrator:complete
+        if flushes_turns:
+            self._flush_turns()
 
     async def cleanup(self) -> None:
         """Flush remaining buffer and close CXDB connection.
@@ -217,24 +350,34 @@ class CXDBEventHook:
         Called during session teardown. Best-effort -- errors are logged.
         """
         try:
-            # Flush any remaining turns
-            turn = self._turn_accumulator.flush()
-            if turn is not None and self._turns_context_id is not None:
-                items = self._turn_accumulator.to_conversation_items(turn)
-                for item in items:
-                    await self._write_turn(
-                        self._turns_context_id,
-                        item,
-                        "cxdb.ConversationItem",
-                        type_version=3,
-                    )
+            # Queue any remaining turns (nothing to do without a turns context)
+            if self._turns_context_id is not None:
+                self._flush_turns()
         except Exception as e:
             logger.debug(f"Error flushing turns during cleanup: {e}")
 
+        try:
+            # Let the writer drain the queue, then stop it
+            if self._writer_task is not None:
+                if not self._writer_task.done():
+                    await self._queue.join()
+                self._writer_task.cancel()
+                try:
+                    await self._writer_task
+                except asyncio.CancelledError:
+                    pass
+                self._writer_task = None
+            # Anything still queued (e.g. writer never started) goes out directly
+            leftovers = self._take_queued(self._queue.qsize())
+            if leftovers:
+                await self._write_batch(leftovers)
+        except Exception as e:
+            logger.debug(f"Error draining write queue during cleanup: {e}")
+
         try:
             # Flush event buffer
             if self._buffer.size > 0 and self._client.connected:
-                await self._buffer.flush(self._send_turn)
+                await self._buffer.flush_many(self._send_buffered)
         except Exception as e:
             logger.debug(f"Error flushing buffer during cleanup: {e}")
 
@@ -243,32 +386,30 @@ class CXDBEventHook:
         except Exception as e:
             logger.debug(f"Error closing CXDB connection: {e}")
 
-    def _handle_turn_event(self, event: str, data: dict[str, Any]) -> None:
-        """Route turn-related events to the turn accumulator.
+    def _route(
+        self, event: str
+    ) -> tuple[bool, Callable[[dict[str, Any]], None] | None, bool]:
+        """Compute and cache the routing decision for an event name.
+
+        The event set is static, so variant dedup, the turn handler lookup and
+        the orchestrator:complete check only run once per distinct event.
 
         Args:
             event: Amplifier event name.
-            data: Event data dict.
+
+        Returns:
+            Tuple of (process, turn_handler, flushes_turns).
         """
-        if event == "prompt:submit":
-            self._turn_accumulator.on_prompt_submit(data)
-        elif event == "content_block:end":
-            self._turn_accumulator.on_content_block_end(data)
-        elif event == "tool:pre":
-            self._turn_accumulator.on_tool_pre(data)
-        elif event == "tool:post":
-            self._turn_accumulator.on_tool_post(data)
-        elif event == "provider:request":
-            self._turn_accumulator.on_provider_request(data)
-        elif event == "provider:response":
-            self._turn_accumulator.on_provider_response(data)
-        elif event == "execution:end":
-            self._turn_accumulator.on_execution_end()
-
-    async def _write_to_everything_context(
-        self, event: str, data: dict[str, Any]
-    ) -> None:
-        """Write an event to the everything context as a ConversationItem system message.
+        route = (
+            self._variant_dedup.should_process(event),
+            self._turn_handlers.get(event),
+            event == "orchestrator:complete",
+        )
+        self._routes[event] = route
+        return route
+
+    def _write_to_everything_context(self, event: str, data: dict[str, Any]) -> None:
+        """Queue an event for the everything context as a ConversationItem system item.
 
         Wraps each event as cxdb.ConversationItem with item_type="system" so the
         CXDB UI renders it with proper System badges instead of falling through
@@ -277,74 +418,103 @@ class CXDBEventHook:
         if self._everything_context_id is None:
             return
 
-        item = build_event_as_system_item(
-            event_name=event,
-            data=data,
-            session_id=self._session_id,
-            parent_session_id=self._parent_id,
-            agent_name=self._agent_name,
-            root_session_id=self._root_session_id,
-        )
+        item = self._build_system_item(event_name=event, data=data)
+        self._submit(self._everything_context_id, pack_payload(item))
 
-        await self._write_turn(
-            self._everything_context_id,
-            item,
-            "cxdb.ConversationItem",
-            type_version=3,
-        )
+    def _flush_turns(self) -> None:
+        """Queue accumulated turns for the turns context.
 
-    async def _flush_turns(self) -> None:
-        """Flush accumulated turns to the turns context."""
+        The accumulator is always reset; items are only built when there is
+        a turns context to write them to.
+        """
         turn = self._turn_accumulator.flush()
-        if turn is None or self._turns_context_id is None:
+        if self._turns_context_id is None or turn is None:
             return
 
-        items = self._turn_accumulator.to_conversation_items(turn)
-        for item in items:
-            await self._write_turn(
-                self._turns_context_id,
-                item,
-                "cxdb.ConversationItem",
-                type_version=3,
-            )
+        for item in self._turn_accumulator.to_conversation_items(turn):
+            self._submit(self._turns_context_id, pack_payload(item))
 
-    async def _write_turn(
-        self,
-        context_id: int,
-        payload: dict[int, object],
-        type_id: str,
-        type_version: int = 1,
-    ) -> None:
-        """Write a single turn to a CXDB context with error handling."""
+    def _submit(self, context_id: int, serialized: bytes) -> None:
+        """Queue a ConversationItem for the writer.
+
+        When the queue is full, the overflow policy decides which turn is
+        dropped: the oldest queued one ("drop_oldest") or this one.
+        """
+        queue = self._queue
+        turn = (context_id, serialized, "cxdb.ConversationItem", 3)
         try:
-            if self._client.connected:
-                await self._client.append_turn(
-                    context_id=context_id,
-                    payload=payload,
-                    declared_type_id=type_id,
-                    declared_type_version=type_version,
+            queue.put_nowait(turn)
+        except asyncio.QueueFull:
+            if self._queue_drops_oldest:
+                queue.get_nowait()
+                queue.task_done()
+                queue.put_nowait(turn)
+            self._dropped_count += 1
+            now = time.monotonic()
+            if (
+                self._last_drop_log is None
+                or now - self._last_drop_log >= _DROP_LOG_INTERVAL
+            ):
+                self._last_drop_log = now
+                logger.warning(
+                    f"Write queue full: {self._dropped_count} events dropped "
+                    f"(queue size: {self._queue.maxsize})"
                 )
-            else:
-                serialized = serialize_envelope(payload)
-                self._buffer.enqueue(context_id, serialized, type_id)
-        except Exception:
-            serialized = serialize_envelope(payload)
-            self._buffer.enqueue(context_id, serialized, type_id)
 
-    async def _send_turn(
-        self,
-        context_id: int,
-        payload_bytes: bytes,
-        type_id: str,
-        type_version: int,
-    ) -> tuple[int, int]:
-        """Send a pre-serialized turn via the client. Used as flush callback."""
-        import msgpack
-
-        decoded = msgpack.unpackb(payload_bytes, raw=False, strict_map_key=False)
-        return await self._client.append_turn(
-            context_id=context_id,
-            payload=decoded,
-            declared_type_id=type_id,
-            declared_type_version=type_version,
+    async def _writer_loop(self) -> None:
+        """Send queued turns in batches until cancelled."""
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            try:
+                if queue.qsize() < self._batch_max_events - 1:
+                    await asyncio.sleep(self._batch_max_delay)
+                batch.extend(self._take_queued(self._batch_max_events - 1))
+                await self._write_batch(batch)
+            except Exception as e:
+                logger.debug(f"Error writing batch of {len(batch)} turns: {e}")
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    def _take_queued(self, limit: int) -> list[tuple[int, bytes, str, int]]:
+        """Take up to limit turns from the queue without waiting."""
+        queue = self._queue
+        taken: list[tuple[int, bytes, str, int]] = []
+        while len(taken) < limit and not queue.empty():
+            taken.append(queue.get_nowait())
+        return taken
+
+    async def _write_batch(self, turns: list[tuple[int, bytes, str, int]]) -> None:
+        """Write turns in one batch, falling back to the event buffer on failure.
+
+        Each turn is hashed and encoded as an APPEND_TURN payload once; the
+        buffer keeps those payloads, so a retry just resends the same bytes.
+        Previously buffered turns are older, so they are retried first
+        (piggyback retry); if that fails the new turns are buffered behind them.
+        """
+        encoded = [
+            encode_append_turn(context_id, serialized, type_id, type_version)
+            for context_id, serialized, type_id, type_version in turns
+        ]
+        try:
+            if self._client.connected:
+                if self._buffer.size == 0 or await self._buffer.flush_many(
+                    self._send_buffered
+                ):
+                    await self._client.append_encoded_turns(encoded)
+                    return
+        except Exception:
+            pass
+        for (context_id, _, type_id, type_version), turn_payload in zip(
+            turns, encoded
+        ):
+            self._buffer.enqueue(context_id, turn_payload, type_id, type_version)
+
+    async def _send_buffered(
+        self, turns: list[tuple[int, bytes, str, int]]
+    ) -> list[tuple[int, int]]:
+        """Send buffered turns, whose payloads are already APPEND_TURN encoded."""
+        return await self._client.append_encoded_turns(
+            [turn_payload for _, turn_payload, _, _ in turns]
         )
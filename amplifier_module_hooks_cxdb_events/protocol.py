@@ -1,17 +1,60 @@
-"""Binary TCP client for CXDB protocol (MSG_HELLO, MSG_CTX_CREATE, MSG_CTX_FORK, MSG_APPEND_TURN)."""
+"""Binary TCP client for CXDB protocol (MSG_HELLO, MSG_CTX_CREATE, MSG_CTX_FORK, MSG_APPEND_TURN).
+
+Frames are small (typically < 1KB), so the client socket is tuned for latency
+on connect: TCP_NODELAY is set explicitly (on by default, disabling Nagle's
+algorithm) and SO_SNDBUF is raised so batched writes don't stall. Both are
+configurable via the CXDBTcpClient constructor.
+"""
 
 from __future__ import annotations
 
 import asyncio
 import hashlib
 import logging
+import os
+import socket
 import struct
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Any
 
 import blake3
-import msgpack
+import msgspec
 
 logger = logging.getLogger(__name__)
 
+# Reused msgpack encoder. msgspec's encoder is much faster than msgpack.packb
+# and produces byte-identical output for the int-keyed dicts we send.
+_MSGPACK_ENCODER = msgspec.msgpack.Encoder()
+
+# Payloads at least this large are hashed with BLAKE3's multithreaded mode.
+# Below ~1 MiB the thread pool hand-off costs more than it saves, and it
+# never helps on a single core.
+_BLAKE3_MT_THRESHOLD = 1 << 20
+_BLAKE3_MT = (os.cpu_count() or 1) > 1
+
+# Per-thread BLAKE3 hasher, reused so it is not reallocated for every payload.
+_HASHER_LOCAL = threading.local()
+
+
+def hash_payload(msgpack_bytes: bytes) -> bytes:
+    """BLAKE3-256 digest of a msgpack payload.
+
+    Small payloads reuse a per-thread hasher (reset between calls) instead of
+    allocating a new one; large payloads use the multithreaded hasher.
+    """
+    if _BLAKE3_MT and len(msgpack_bytes) >= _BLAKE3_MT_THRESHOLD:
+        return blake3.blake3(msgpack_bytes, max_threads=blake3.blake3.AUTO).digest()
+    hasher = getattr(_HASHER_LOCAL, "hasher", None)
+    if hasher is None:
+        hasher = _HASHER_LOCAL.hasher = blake3.blake3()
+    else:
+        hasher.reset()
+    hasher.update(msgpack_bytes)
+    return hasher.digest()
+
+
 # Message type constants
 MSG_HELLO = 1
 MSG_CTX_CREATE = 2
@@ -31,6 +74,40 @@ FRAME_HEADER_FORMAT = (
 )
 
 
+_FRAME_HEADER = struct.Struct(FRAME_HEADER_FORMAT)
+
+# APPEND_TURN fixed-size fields, packed with precompiled structs:
+# context_id(u64) + parent_turn_id(u64) + type_id_len(u32)
+_APPEND_PREFIX = struct.Struct("<QQI")
+# type_version(u32) + encoding(u32) + compression(u32) + uncompressed_len(u32)
+_APPEND_META = struct.Struct("<IIII")
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+# Length prefix of the idempotency key, always a 32-byte SHA-256 digest
+_IDEMPOTENCY_KEY_LEN = _U32.pack(32)
+
+# Response layouts, unpacked in place with unpack_from:
+# context_id(u64) + turn_id(u64) + depth(u32) -- CTX_CREATE, CTX_FORK, APPEND ack
+_CONTEXT_HEAD = struct.Struct("<QQI")
+# head_turn_id(u64) + head_depth(u32) -- GET_HEAD
+_TURN_HEAD = struct.Struct("<QI")
+# code(u32) + detail_len(u32) -- MSG_ERROR
+_ERROR_PREFIX = struct.Struct("<II")
+# protocol_version(u16) + tag_len(u16) -- HELLO
+_HELLO_PREFIX = struct.Struct("<HH")
+
+
+def encode_frame_header(
+    msg_type: int, request_id: int, payload_len: int, flags: int = 0
+) -> bytes:
+    """Encode only the 16-byte frame header for a payload of payload_len bytes.
+
+    Lets callers hand header and payload to the transport separately instead
+    of concatenating them into a new frame buffer.
+    """
+    return _FRAME_HEADER.pack(payload_len, msg_type, flags, request_id)
+
+
 def encode_frame(
     msg_type: int, request_id: int, payload: bytes, flags: int = 0
 ) -> bytes:
@@ -45,8 +122,7 @@ def encode_frame(
     Returns:
         Complete frame bytes including header and payload.
     """
-    header = struct.pack(FRAME_HEADER_FORMAT, len(payload), msg_type, flags, request_id)
-    return header + payload
+    return encode_frame_header(msg_type, request_id, len(payload), flags) + payload
 
 
 def decode_frame(data: bytes) -> tuple[int, int, int, bytes]:
@@ -66,9 +142,7 @@ def decode_frame(data: bytes) -> tuple[int, int, int, bytes]:
             f"Frame too short: {len(data)} bytes, need at least {FRAME_HEADER_SIZE}"
         )
 
-    payload_len, msg_type, flags, request_id = struct.unpack(
-        FRAME_HEADER_FORMAT, data[:FRAME_HEADER_SIZE]
-    )
+    payload_len, msg_type, flags, request_id = _FRAME_HEADER.unpack_from(data)
     payload = data[FRAME_HEADER_SIZE : FRAME_HEADER_SIZE + payload_len]
 
     if len(payload) < payload_len:
@@ -100,25 +174,74 @@ def encode_append_turn_payload(
     Returns:
         Complete APPEND_TURN payload bytes ready for framing.
     """
-    type_id_bytes = declared_type_id.encode("utf-8")
-    idempotency_key = generate_idempotency_key(context_id, content_hash)
-
-    parts = [
-        struct.pack("<Q", context_id),
-        struct.pack("<Q", parent_turn_id),
-        struct.pack("<I", len(type_id_bytes)),
-        type_id_bytes,
-        struct.pack("<I", declared_type_version),
-        struct.pack("<I", ENCODING_MSGPACK),
-        struct.pack("<I", COMPRESSION_NONE),
-        struct.pack("<I", len(msgpack_bytes)),
-        content_hash,
-        struct.pack("<I", len(msgpack_bytes)),
-        msgpack_bytes,
-        struct.pack("<I", len(idempotency_key)),
-        idempotency_key,
-    ]
-    return b"".join(parts)
+    type_id_bytes = _encode_type_id(declared_type_id)
+    # Same key as generate_idempotency_key(), computed inline
+    idempotency = _idempotency_hasher(context_id).copy()
+    idempotency.update(content_hash)
+
+    payload_len = len(msgpack_bytes)
+
+    return b"".join(
+        (
+            _APPEND_PREFIX.pack(context_id, parent_turn_id, len(type_id_bytes)),
+            type_id_bytes,
+            _APPEND_META.pack(
+                declared_type_version, ENCODING_MSGPACK, COMPRESSION_NONE, payload_len
+            ),
+            content_hash,
+            _U32.pack(payload_len),
+            msgpack_bytes,
+            _IDEMPOTENCY_KEY_LEN,
+            idempotency.digest(),
+        )
+    )
+
+
+@lru_cache(maxsize=64)
+def _encode_type_id(declared_type_id: str) -> bytes:
+    """UTF-8 type identifier; the set of CXDB type IDs is small and static."""
+    return declared_type_id.encode("utf-8")
+
+
+def encode_append_turn(
+    context_id: int,
+    msgpack_bytes: bytes,
+    declared_type_id: str,
+    declared_type_version: int = 1,
+    parent_turn_id: int = 0,
+) -> bytes:
+    """Hash msgpack_bytes and build its complete APPEND_TURN payload.
+
+    The result can be kept and resent with CXDBTcpClient.append_encoded_turns(),
+    so a retried turn is not hashed or re-encoded again.
+
+    Args:
+        context_id: Target context.
+        msgpack_bytes: Pre-encoded msgpack payload.
+        declared_type_id: Type identifier string (e.g., "amplifier.ToolEvent").
+        declared_type_version: Type version number.
+        parent_turn_id: Parent turn (0 = append to current head).
+
+    Returns:
+        Complete APPEND_TURN payload bytes ready for framing.
+    """
+    return encode_append_turn_payload(
+        context_id=context_id,
+        msgpack_bytes=msgpack_bytes,
+        content_hash=hash_payload(msgpack_bytes),
+        declared_type_id=declared_type_id,
+        declared_type_version=declared_type_version,
+        parent_turn_id=parent_turn_id,
+    )
+
+
+@lru_cache(maxsize=64)
+def _idempotency_hasher(context_id: int) -> Any:
+    """SHA-256 primed with the "context_id:" prefix; copied per key, never updated.
+
+    A hook only ever writes to a few contexts.
+    """
+    return hashlib.sha256(_U64.pack(context_id) + b":")
 
 
 def generate_idempotency_key(context_id: int, content_hash: bytes) -> bytes:
@@ -131,12 +254,13 @@ def generate_idempotency_key(context_id: int, content_hash: bytes) -> bytes:
     Returns:
         SHA-256 digest bytes (32 bytes).
     """
-    key_input = struct.pack("<Q", context_id) + b":" + content_hash
-    return hashlib.sha256(key_input).digest()
+    hasher = _idempotency_hasher(context_id).copy()
+    hasher.update(content_hash)
+    return hasher.digest()
 
 
-def serialize_payload(payload: dict) -> tuple[bytes, bytes]:
-    """Serialize a payload dict to msgpack and compute BLAKE3 hash.
+def pack_payload(payload: dict) -> bytes:
+    """Serialize a payload dict to msgpack bytes.
 
     Payload keys MUST be integers (tag numbers per CXDB spec).
     Keys are sorted ascending for deterministic encoding.
@@ -145,21 +269,201 @@ def serialize_payload(payload: dict) -> tuple[bytes, bytes]:
         payload: Dict with integer keys mapping to values.
 
     Returns:
-        Tuple of (msgpack_bytes, blake3_hash_bytes).
+        Msgpack-encoded bytes.
     """
     # Sort by key for deterministic encoding
-    sorted_payload = dict(sorted(payload.items()))
-    msgpack_bytes = msgpack.packb(sorted_payload, use_bin_type=True)
-    content_hash = blake3.blake3(msgpack_bytes).digest()
-    return msgpack_bytes, content_hash
+    keys = list(payload)
+    sorted_keys = sorted(keys)
+    # The schema builders emit tags in ascending order, so the payload
+    # can usually be encoded as-is without building a sorted copy
+    if keys == sorted_keys:
+        return _MSGPACK_ENCODER.encode(payload)
+    return _MSGPACK_ENCODER.encode({key: payload[key] for key in sorted_keys})
+
+
+def serialize_payload(payload: dict) -> tuple[bytes, bytes]:
+    """Serialize a payload dict to msgpack and compute BLAKE3 hash.
+
+    Args:
+        payload: Dict with integer keys mapping to values.
+
+    Returns:
+        Tuple of (msgpack_bytes, blake3_hash_bytes).
+    """
+    msgpack_bytes = pack_payload(payload)
+    return msgpack_bytes, hash_payload(msgpack_bytes)
 
 
 class CXDBProtocolError(Exception):
     """Raised when CXDB server returns an error frame."""
 
 
+def _parse_append_ack(response: bytes) -> tuple[int, int]:
+    """Parse an APPEND_TURN_ACK payload into (new_turn_id, new_depth).
+
+    Layout: context_id(u64) + new_turn_id(u64) + new_depth(u32) + hash(32)
+
+    Raises:
+        CXDBProtocolError: If the ACK is too short.
+    """
+    if len(response) < 20:
+        raise CXDBProtocolError(f"APPEND_TURN_ACK too short: {len(response)} bytes")
+    _, new_turn_id, new_depth = _CONTEXT_HEAD.unpack_from(response)
+    return new_turn_id, new_depth
+
+
+def _parse_error(payload: bytes) -> CXDBProtocolError:
+    """Build the exception for a MSG_ERROR payload.
+
+    Layout: code(u32) + detail_len(u32) + detail (utf-8)
+    """
+    if len(payload) >= 8:
+        error_code, detail_len = _ERROR_PREFIX.unpack_from(payload)
+        detail = payload[8 : 8 + detail_len].decode("utf-8", errors="replace")
+        return CXDBProtocolError(f"CXDB error (code={error_code}): {detail}")
+    # Fallback for unexpected error format
+    error_msg = payload.decode("utf-8", errors="replace")
+    return CXDBProtocolError(f"CXDB error: {error_msg}")
+
+
+def install_uvloop_policy() -> bool:
+    """Make new event loops use uvloop, if it is installed.
+
+    The client's per-frame cost is dominated by event-loop overhead, which
+    uvloop's libuv transports cut substantially. Hooks are mounted into a loop
+    that is already running, so this is left to the host: call it before the
+    loop is created (e.g. before asyncio.run()). Install with the "uvloop" extra.
+
+    Returns:
+        True if the uvloop policy was installed, False if uvloop is unavailable.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
+# Initial size of the receive buffer; grown when a single frame is larger.
+_RX_BUFFER_SIZE = 1 << 16
+
+
+class _CXDBFrameProtocol(asyncio.BufferedProtocol):
+    """Receives response frames straight into a reusable buffer.
+
+    The transport reads into the buffer returned by get_buffer(); headers are
+    parsed in place with unpack_from, and each complete frame is handed to the
+    client with a single copy of its payload.
+    """
+
+    def __init__(self, client: CXDBTcpClient) -> None:
+        self._client = client
+        self._rx = bytearray(_RX_BUFFER_SIZE)
+        self._rx_end = 0
+        self._paused = False
+        # Every caller blocked on backpressure gets its own waiter
+        self._drain_waiters: deque[asyncio.Future[None]] = deque()
+        self._lost = False
+        self.closed: asyncio.Future[None] = (
+            asyncio.get_running_loop().create_future()
+        )
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        if self._rx_end == len(self._rx):
+            # buffer_updated() sizes the buffer for the frame being received,
+            # so this is only a safety net
+            self._resize(len(self._rx) * 2)
+        return memoryview(self._rx)[self._rx_end :]
+
+    def buffer_updated(self, nbytes: int) -> None:
+        self._rx_end += nbytes
+        rx = self._rx
+        end = self._rx_end
+        pos = 0
+        needed = 0
+        with memoryview(rx) as view:
+            while end - pos >= FRAME_HEADER_SIZE:
+                payload_len, msg_type, _flags, request_id = _FRAME_HEADER.unpack_from(
+                    rx, pos
+                )
+                frame_end = pos + FRAME_HEADER_SIZE + payload_len
+                if frame_end > end:
+                    needed = FRAME_HEADER_SIZE + payload_len
+                    break
+                payload = bytes(view[pos + FRAME_HEADER_SIZE : frame_end])
+                pos = frame_end
+                self._client._resolve(request_id, msg_type, payload)
+        if pos:
+            # Move the partial frame (if any) to the front of the buffer
+            rx[: end - pos] = rx[pos:end]
+            self._rx_end = end - pos
+        if needed > len(rx):
+            self._resize(needed)
+
+    def _resize(self, size: int) -> None:
+        # The transport may still hold a view of the old buffer, so copy into
+        # a new one rather than resizing in place.
+        rx = bytearray(size)
+        rx[: self._rx_end] = self._rx[: self._rx_end]
+        self._rx = rx
+
+    def pause_writing(self) -> None:
+        self._paused = True
+
+    def resume_writing(self) -> None:
+        self._paused = False
+        self._wake_drain(None)
+
+    def eof_received(self) -> bool:
+        return False  # let the transport close itself
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self._lost = True
+        self._wake_drain(exc or ConnectionResetError("Connection lost"))
+        if not self.closed.done():
+            self.closed.set_result(None)
+        self._client._connection_lost(exc)
+
+    async def drain(self) -> None:
+        """Wait until the transport's write buffer is below its high-water mark."""
+        if self._lost:
+            raise ConnectionResetError("Connection lost")
+        if not self._paused:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._drain_waiters.append(waiter)
+        try:
+            await waiter
+        finally:
+            self._drain_waiters.remove(waiter)
+
+    def _wake_drain(self, exc: Exception | None) -> None:
+        """Wake (or fail) every caller waiting in drain()."""
+        for waiter in self._drain_waiters:
+            if waiter.done():
+                continue
+            if exc is None:
+                waiter.set_result(None)
+            else:
+                waiter.set_exception(exc)
+
+
+async def _drain_then_gather(
+    protocol: _CXDBFrameProtocol, futures: list[asyncio.Future[bytes]]
+) -> list[bytes | BaseException]:
+    """Wait for the write buffer to drain, then for every response."""
+    await protocol.drain()
+    return await asyncio.gather(*futures, return_exceptions=True)
+
+
 class CXDBTcpClient:
-    """Async TCP client for CXDB binary protocol."""
+    """Async TCP client for CXDB binary protocol.
+
+    Requests are pipelined: each frame gets a request ID and a pending future,
+    and the connection's protocol resolves futures by request ID as responses
+    arrive. Callers never wait for each other's round trips.
+    """
 
     def __init__(
         self,
@@ -167,16 +471,22 @@ class CXDBTcpClient:
         port: int,
         timeout: float = 5.0,
         client_tag: str = "amplifier-hooks-cxdb",
+        tcp_nodelay: bool = True,
+        sndbuf_bytes: int | None = 1 << 20,
     ):
         self.host = host
         self.port = port
         self.timeout = timeout
         self.client_tag = client_tag
-        self._reader: asyncio.StreamReader | None = None
-        self._writer: asyncio.StreamWriter | None = None
+        self.tcp_nodelay = tcp_nodelay
+        self.sndbuf_bytes = sndbuf_bytes
+        self._transport: asyncio.Transport | None = None
+        self._protocol: _CXDBFrameProtocol | None = None
         self._request_id: int = 0
         self._connected: bool = False
         self._session_id: int | None = None
+        # In-flight requests by request ID, resolved as response frames arrive
+        self._pending: dict[int, asyncio.Future[bytes]] = {}
 
     @property
     def connected(self) -> bool:
@@ -198,9 +508,12 @@ class CXDBTcpClient:
             ConnectionError: If connection fails or times out.
             CXDBProtocolError: If handshake fails.
         """
+        loop = asyncio.get_running_loop()
         try:
-            self._reader, self._writer = await asyncio.wait_for(
-                asyncio.open_connection(self.host, self.port),
+            self._transport, self._protocol = await asyncio.wait_for(
+                loop.create_connection(
+                    lambda: _CXDBFrameProtocol(self), self.host, self.port
+                ),
                 timeout=self.timeout,
             )
         except (OSError, asyncio.TimeoutError) as e:
@@ -208,18 +521,24 @@ class CXDBTcpClient:
                 f"Failed to connect to CXDB at {self.host}:{self.port}: {e}"
             ) from e
 
+        self._tune_socket(self._transport.get_extra_info("socket"))
+
         # Build HELLO payload (new format, matching Go client)
         tag_bytes = self.client_tag.encode("utf-8")
-        hello_payload = struct.pack(
-            "<HH", 1, len(tag_bytes)
-        )  # protocol_version=1, tag_len
-        hello_payload += tag_bytes
-        hello_payload += struct.pack("<I", 0)  # client_meta_json_len=0
+        hello_payload = (
+            _HELLO_PREFIX.pack(1, len(tag_bytes))  # protocol_version=1, tag_len
+            + tag_bytes
+            + _U32.pack(0)  # client_meta_json_len=0
+        )
 
-        response = await self._send_and_recv(MSG_HELLO, hello_payload)
+        try:
+            response = await self._send_and_recv(MSG_HELLO, hello_payload)
+        except Exception:
+            await self.close()
+            raise
         # Response: session_id(u64 LE) [+ optional protocol_version(u16 LE)]
         if len(response) >= 8:
-            self._session_id = struct.unpack("<Q", response[:8])[0]
+            (self._session_id,) = _U64.unpack_from(response)
             logger.info(
                 "Connected to CXDB (session=%d, tag=%s)",
                 self._session_id,
@@ -228,6 +547,21 @@ class CXDBTcpClient:
 
         self._connected = True
 
+    def _tune_socket(self, sock: socket.socket | None) -> None:
+        """Apply latency-oriented socket options. Best effort -- failures are logged."""
+        if sock is None:
+            return
+        # asyncio enables TCP_NODELAY on every TCP transport, so the option is
+        # always written: tcp_nodelay=False has to turn it back off
+        options = [(socket.IPPROTO_TCP, socket.TCP_NODELAY, int(self.tcp_nodelay))]
+        if self.sndbuf_bytes:
+            options.append((socket.SOL_SOCKET, socket.SO_SNDBUF, self.sndbuf_bytes))
+        for level, option, value in options:
+            try:
+                sock.setsockopt(level, option, value)
+            except OSError as e:
+                logger.debug("Failed to set socket option %d: %s", option, e)
+
     async def create_context(self, base_turn_id: int = 0) -> tuple[int, int, int]:
         """Create a new CXDB context.
 
@@ -237,27 +571,57 @@ class CXDBTcpClient:
         Returns:
             Tuple of (context_id, head_turn_id, head_depth).
 
+        Raises:
+            ConnectionError: If not connected.
+            CXDBProtocolError: If server returns error.
+        """
+        contexts = await self.create_contexts(1, base_turn_id)
+        return contexts[0]
+
+    async def create_contexts(
+        self, count: int, base_turn_id: int = 0
+    ) -> list[tuple[int, int, int]]:
+        """Create several CXDB contexts in a single write.
+
+        All CTX_CREATE frames are written with one drain and the responses
+        are read back in request order, so N contexts cost one round trip.
+
+        Args:
+            count: Number of contexts to create.
+            base_turn_id: Turn ID to base each context on. 0 = empty context.
+
+        Returns:
+            List of (context_id, head_turn_id, head_depth), one per context.
+
         Raises:
             ConnectionError: If not connected.
             CXDBProtocolError: If server returns error.
         """
         self._ensure_connected()
-        response = await self._send_and_recv(
-            MSG_CTX_CREATE, struct.pack("<Q", base_turn_id)
-        )
-        # Response: context_id(u64) + head_turn_id(u64) + head_depth(u32) = 20 bytes
-        if len(response) < 20:
-            raise CXDBProtocolError(
-                f"CTX_CREATE response too short: {len(response)} bytes"
+        if count <= 0:
+            return []
+
+        payload = _U64.pack(base_turn_id)
+        responses = await self._send_and_recv_many(MSG_CTX_CREATE, [payload] * count)
+
+        contexts = []
+        for response in responses:
+            # Response: context_id(u64) + head_turn_id(u64) + head_depth(u32) = 20 bytes
+            if len(response) < 20:
+                raise CXDBProtocolError(
+                    f"CTX_CREATE response too short: {len(response)} bytes"
+                )
+            context_id, head_turn_id, head_depth = _CONTEXT_HEAD.unpack_from(
+                response
             )
-        context_id, head_turn_id, head_depth = struct.unpack("<QQI", response[:20])
-        logger.debug(
-            "Created context %d (head=%d, depth=%d)",
-            context_id,
-            head_turn_id,
-            head_depth,
-        )
-        return context_id, head_turn_id, head_depth
+            logger.debug(
+                "Created context %d (head=%d, depth=%d)",
+                context_id,
+                head_turn_id,
+                head_depth,
+            )
+            contexts.append((context_id, head_turn_id, head_depth))
+        return contexts
 
     async def get_head(self, context_id: int) -> tuple[int, int]:
         """Get the current head of a context.
@@ -274,13 +638,13 @@ class CXDBTcpClient:
         """
         self._ensure_connected()
         response = await self._send_and_recv(
-            MSG_GET_HEAD, struct.pack("<Q", context_id)
+            MSG_GET_HEAD, _U64.pack(context_id)
         )
         if len(response) < 12:
             raise CXDBProtocolError(
                 f"GET_HEAD response too short: {len(response)} bytes"
             )
-        head_turn_id, head_depth = struct.unpack("<QI", response[:12])
+        head_turn_id, head_depth = _TURN_HEAD.unpack_from(response)
         return head_turn_id, head_depth
 
     async def fork_context(self, base_turn_id: int) -> tuple[int, int, int]:
@@ -297,14 +661,14 @@ class CXDBTcpClient:
             CXDBProtocolError: If server returns error.
         """
         self._ensure_connected()
-        payload = struct.pack("<Q", base_turn_id)
+        payload = _U64.pack(base_turn_id)
         response = await self._send_and_recv(MSG_CTX_FORK, payload)
         # Response: new_context_id(u64) + head_turn_id(u64) + head_depth(u32) = 20 bytes
         if len(response) < 20:
             raise CXDBProtocolError(
                 f"CTX_FORK response too short: {len(response)} bytes"
             )
-        new_context_id, head_turn_id, head_depth = struct.unpack("<QQI", response[:20])
+        new_context_id, head_turn_id, head_depth = _CONTEXT_HEAD.unpack_from(response)
         logger.debug("Forked context %d from turn %d", new_context_id, base_turn_id)
         return new_context_id, head_turn_id, head_depth
 
@@ -337,46 +701,65 @@ class CXDBTcpClient:
         """
         self._ensure_connected()
 
-        # Serialize and hash
-        msgpack_bytes, content_hash = serialize_payload(payload)
-
         # Build APPEND_TURN payload
-        turn_payload = encode_append_turn_payload(
-            context_id=context_id,
-            msgpack_bytes=msgpack_bytes,
-            content_hash=content_hash,
-            declared_type_id=declared_type_id,
-            declared_type_version=declared_type_version,
+        turn_payload = encode_append_turn(
+            context_id,
+            pack_payload(payload),
+            declared_type_id,
+            declared_type_version,
             parent_turn_id=parent_turn_id,
         )
 
         # Send and receive
         response = await self._send_and_recv(MSG_APPEND_TURN, turn_payload)
-
-        # Parse APPEND_TURN_ACK: context_id(u64) + new_turn_id(u64) + new_depth(u32) + hash(32)
-        if len(response) < 20:
-            raise CXDBProtocolError(f"APPEND_TURN_ACK too short: {len(response)} bytes")
-        _, new_turn_id, new_depth = struct.unpack("<QQI", response[:20])
+        new_turn_id, new_depth = _parse_append_ack(response)
 
         logger.debug(
             f"Appended turn {new_turn_id} (depth {new_depth}) to context {context_id}"
         )
         return new_turn_id, new_depth
 
+    async def append_encoded_turns(
+        self, turn_payloads: list[bytes]
+    ) -> list[tuple[int, int]]:
+        """Send pre-built APPEND_TURN payloads in a single write.
+
+        Each payload comes from encode_append_turn() and already carries its
+        context, content hash and idempotency key, so nothing is re-encoded.
+
+        Args:
+            turn_payloads: APPEND_TURN payloads, one per turn.
+
+        Returns:
+            List of (new_turn_id, new_depth), one per turn, in order.
+
+        Raises:
+            ConnectionError: If not connected.
+            CXDBProtocolError: If server returns error for any turn.
+        """
+        self._ensure_connected()
+        if not turn_payloads:
+            return []
+
+        responses = await self._send_and_recv_many(MSG_APPEND_TURN, turn_payloads)
+        return [_parse_append_ack(response) for response in responses]
+
     async def close(self) -> None:
-        """Close the TCP connection."""
+        """Close the TCP connection, failing any requests still in flight."""
         self._connected = False
-        if self._writer:
+        transport, protocol = self._transport, self._protocol
+        self._transport = None
+        self._protocol = None
+        self._fail_pending(ConnectionError("CXDB connection closed"))
+        if transport is not None and protocol is not None:
             try:
-                self._writer.close()
-                await self._writer.wait_closed()
+                transport.close()
+                await protocol.closed
             except Exception:
                 pass  # Best effort cleanup
-            self._writer = None
-            self._reader = None
 
     async def _send_and_recv(self, msg_type: int, payload: bytes) -> bytes:
-        """Send a frame and read the response frame.
+        """Send a frame and wait for its response frame.
 
         Args:
             msg_type: Message type to send.
@@ -389,54 +772,107 @@ class CXDBTcpClient:
             ConnectionError: If send/recv fails.
             CXDBProtocolError: If server returns MSG_ERROR.
         """
-        if not self._writer or not self._reader:
-            raise ConnectionError("Not connected to CXDB")
+        responses = await self._send_and_recv_many(msg_type, [payload])
+        return responses[0]
 
-        request_id = self._next_request_id()
-        frame = encode_frame(msg_type, request_id, payload)
+    async def _send_and_recv_many(
+        self, msg_type: int, payloads: list[bytes]
+    ) -> list[bytes]:
+        """Send several frames in one write and wait for all their responses.
 
-        try:
-            self._writer.write(frame)
-            await self._writer.drain()
+        Each frame is registered under its own request ID before the write,
+        and the connection protocol resolves them as responses arrive. If any
+        response is MSG_ERROR, all responses are still awaited before the first
+        error is raised.
 
-            # Read response header
-            header_data = await asyncio.wait_for(
-                self._reader.readexactly(FRAME_HEADER_SIZE),
-                timeout=self.timeout,
-            )
-            resp_payload_len, resp_type, _resp_flags, _resp_req_id = struct.unpack(
-                FRAME_HEADER_FORMAT, header_data
-            )
+        Args:
+            msg_type: Message type to send.
+            payloads: Payload bytes, one per frame.
 
-            # Read response payload
-            if resp_payload_len > 0:
-                resp_payload = await asyncio.wait_for(
-                    self._reader.readexactly(resp_payload_len),
-                    timeout=self.timeout,
-                )
-            else:
-                resp_payload = b""
-
-            # Check for error response
-            if resp_type == MSG_ERROR:
-                if len(resp_payload) >= 8:
-                    error_code, detail_len = struct.unpack("<II", resp_payload[:8])
-                    detail = resp_payload[8 : 8 + detail_len].decode(
-                        "utf-8", errors="replace"
-                    )
-                    raise CXDBProtocolError(f"CXDB error (code={error_code}): {detail}")
-                else:
-                    # Fallback for unexpected error format
-                    error_msg = resp_payload.decode("utf-8", errors="replace")
-                    raise CXDBProtocolError(f"CXDB error: {error_msg}")
-
-            return resp_payload
+        Returns:
+            Response payload bytes, one per request, in request order.
 
+        Raises:
+            ConnectionError: If send/recv fails.
+            CXDBProtocolError: If server returns MSG_ERROR.
+        """
+        transport, protocol = self._transport, self._protocol
+        if transport is None or protocol is None:
+            raise ConnectionError("Not connected to CXDB")
+        if transport.is_closing():
+            raise ConnectionError("CXDB connection lost")
+
+        loop = asyncio.get_running_loop()
+        request_ids: list[int] = []
+        futures: list[asyncio.Future[bytes]] = []
+        # Header and payload are written as separate buffers so no per-frame
+        # concatenation is needed; the transport writes them out together.
+        # Headers are packed inline (same layout as encode_frame_header()).
+        pack_header = _FRAME_HEADER.pack
+        parts: list[bytes] = []
+        for payload in payloads:
+            request_id = self._next_request_id()
+            future: asyncio.Future[bytes] = loop.create_future()
+            self._pending[request_id] = future
+            request_ids.append(request_id)
+            futures.append(future)
+            parts.append(pack_header(len(payload), msg_type, 0, request_id))
+            parts.append(payload)
+
+        try:
+            transport.writelines(parts)
+            # Waiting for the write buffer to drain counts against the same
+            # timeout, so a peer that stops reading cannot block forever
+            results = await asyncio.wait_for(
+                _drain_then_gather(protocol, futures), timeout=self.timeout
+            )
         except asyncio.TimeoutError as e:
             raise ConnectionError(f"CXDB response timeout after {self.timeout}s") from e
-        except (asyncio.IncompleteReadError, OSError) as e:
+        except OSError as e:
             self._connected = False
             raise ConnectionError(f"CXDB connection lost: {e}") from e
+        finally:
+            for request_id in request_ids:
+                self._pending.pop(request_id, None)
+
+        responses: list[bytes] = []
+        first_error: BaseException | None = None
+        for result in results:
+            if isinstance(result, BaseException):
+                if isinstance(result, ConnectionError):
+                    raise result
+                if first_error is None:
+                    first_error = result
+            else:
+                responses.append(result)
+        if first_error is not None:
+            raise first_error
+        return responses
+
+    def _resolve(self, request_id: int, msg_type: int, payload: bytes) -> None:
+        """Resolve the pending request a response frame answers."""
+        future = self._pending.pop(request_id, None)
+        if future is None or future.done():
+            # Caller gave up (timeout) -- drop the late response
+            logger.debug(f"Dropping response for request {request_id}")
+            return
+        if msg_type == MSG_ERROR:
+            future.set_exception(_parse_error(payload))
+        else:
+            future.set_result(payload)
+
+    def _connection_lost(self, exc: Exception | None) -> None:
+        """Mark the client disconnected and fail every in-flight request."""
+        self._connected = False
+        reason = exc or "connection closed by server"
+        self._fail_pending(ConnectionError(f"CXDB connection lost: {reason}"))
+
+    def _fail_pending(self, error: ConnectionError) -> None:
+        """Fail every in-flight request with the given error."""
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
 
     def _ensure_connected(self) -> None:
         """Raise if not connected."""
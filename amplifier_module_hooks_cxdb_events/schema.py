@@ -3,18 +3,22 @@
 from __future__ import annotations
 
 import hashlib
+import importlib.metadata
 import json
 import logging
 import os
 import platform
-import re
 import socket
 import time
+import uuid
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
 import httpx
-import msgpack
+import msgspec
+
+from amplifier_module_hooks_cxdb_events.protocol import pack_payload
 
 logger = logging.getLogger(__name__)
 
@@ -70,13 +74,12 @@ _ENV_ALLOWLIST = [
 
 
 # ---------------------------------------------------------------------------
-# Process-level provenance (captured once at import, reused for all contexts)
+# Process-level provenance (captured once on first use, reused for all contexts)
 # ---------------------------------------------------------------------------
 
 def _get_amplifier_version() -> str:
     """Get the amplifier-core version string, or empty on failure."""
     try:
-        import importlib.metadata
         return importlib.metadata.version("amplifier-core")
     except Exception:
         return ""
@@ -100,13 +103,11 @@ def _capture_env_vars(allowlist: list[str]) -> dict[str, str]:
 
 
 def _capture_process_provenance() -> dict[int, Any]:
-    """Capture process-level provenance once at startup.
+    """Capture process-level provenance (see _process_provenance()).
 
     Returns a dict with integer keys matching CXDB Provenance tag numbers.
     Stable fields that don't change across contexts within the same process.
     """
-    import uuid
-
     prov: dict[int, Any] = {
         PROV_TAG_SERVICE_NAME: "amplifier",
         PROV_TAG_SERVICE_INSTANCE_ID: str(uuid.uuid4()),
@@ -131,18 +132,31 @@ def _capture_process_provenance() -> dict[int, Any]:
     return prov
 
 
-_PROCESS_PROVENANCE = _capture_process_provenance()
+@lru_cache(maxsize=1)
+def _process_provenance() -> dict[int, Any]:
+    """Process-level provenance, captured on first use rather than at import.
+
+    The returned dict is shared; callers must copy it before adding fields.
+    """
+    return _capture_process_provenance()
 
 
 def _ts_ms() -> int:
     """Current time as milliseconds since epoch."""
-    return int(time.time() * 1000)
+    return time.time_ns() // 1_000_000
+
+
+@lru_cache(maxsize=256)
+def _session_hasher(session_id: str) -> Any:
+    """BLAKE2b state primed with the session prefix, copied for each item ID."""
+    return hashlib.blake2b(f"{session_id}:".encode(), digest_size=12)
 
 
 def _make_item_id(session_id: str, label: str, ts: int) -> str:
-    """Deterministic item ID from session + label + timestamp."""
-    raw = f"{session_id}:{label}:{ts}"
-    return hashlib.sha256(raw.encode()).hexdigest()[:24]
+    """Deterministic 24-hex-char item ID from session + label + timestamp."""
+    h = _session_hasher(session_id).copy()
+    h.update(f"{label}:{ts}".encode())
+    return h.hexdigest()
 
 
 def build_provenance(
@@ -156,9 +170,10 @@ def build_provenance(
 ) -> dict[int, Any]:
     """Build a full provenance map merging process-level and per-context fields.
 
-    Starts with cached _PROCESS_PROVENANCE and layers on per-context identity.
+    Starts with the cached process provenance and layers on per-context identity.
     """
-    prov: dict[int, Any] = dict(_PROCESS_PROVENANCE)
+    process_prov = _process_provenance()
+    prov: dict[int, Any] = {**process_prov}
 
     if parent_context_id is not None:
         prov[PROV_TAG_PARENT_CTX] = parent_context_id
@@ -171,14 +186,16 @@ def build_provenance(
 
     prov[PROV_TAG_TRACE_ID] = session_id
 
-    env: dict[str, str] = dict(prov.get(PROV_TAG_ENV, {}))
+    # The shared process env is copied, never mutated; AMPLIFIER_SESSION is
+    # always set, so the env tag is always present
+    process_env = process_prov.get(PROV_TAG_ENV)
+    env: dict[str, str] = {**process_env} if process_env else {}
     if agent_name:
         env["AMPLIFIER_AGENT"] = agent_name
     if bundle_name:
         env["AMPLIFIER_BUNDLE"] = bundle_name
     env["AMPLIFIER_SESSION"] = session_id
-    if env:
-        prov[PROV_TAG_ENV] = env
+    prov[PROV_TAG_ENV] = env
 
     prov[PROV_TAG_CAPTURED_AT] = _ts_ms()
     return prov
@@ -220,15 +237,14 @@ def build_context_metadata(
     sid_short = session_id[:12]
 
     # Build title: "Amplifier Turns: ac344fc2..." or "Amplifier Events: ac344fc2..."
-    title_parts = ["Amplifier", context_label]
+    # and labels for CQL filtering
+    label_lower = context_label.lower()
     if project_name:
-        title_parts.insert(1, project_name)
-    title = " ".join(title_parts) + f": {sid_short}"
-
-    # Labels for CQL filtering
-    labels = ["amplifier", context_label.lower()]
-    if project_name:
-        labels.append(project_name)
+        title = f"Amplifier {project_name} {context_label}: {sid_short}"
+        labels = ["amplifier", label_lower, project_name]
+    else:
+        title = f"Amplifier {context_label}: {sid_short}"
+        labels = ["amplifier", label_lower]
 
     # Provenance
     provenance = build_provenance(
@@ -244,7 +260,7 @@ def build_context_metadata(
         TAG_ITEM_TYPE: ITEM_SYSTEM,
         TAG_STATUS: "complete",
         TAG_TIMESTAMP: ts,
-        TAG_ID: _make_item_id(session_id, f"context_metadata_{context_label.lower()}", ts),
+        TAG_ID: _make_item_id(session_id, f"context_metadata_{label_lower}", ts),
         TAG_SYSTEM: {
             SM_TAG_KIND: "info",
             SM_TAG_TITLE: f"Context: {context_label}",
@@ -258,10 +274,17 @@ def build_context_metadata(
         },
     }
 
+
 _BUNDLE_PATH = Path(__file__).parent / "conversation_bundle.json"
 _BUNDLE_ID = "amplifier.events-v1"
 
 
+@lru_cache(maxsize=1)
+def _bundle_bytes() -> bytes:
+    """Raw conversation_bundle.json, read once; it is already the PUT body."""
+    return _BUNDLE_PATH.read_bytes()
+
+
 def load_bundle_json() -> dict:
     """Load the CXDB registry bundle from package data.
 
@@ -271,50 +294,58 @@ def load_bundle_json() -> dict:
     Raises:
         FileNotFoundError: If conversation_bundle.json is missing.
     """
-    return json.loads(_BUNDLE_PATH.read_text(encoding="utf-8"))
+    return msgspec.json.decode(_bundle_bytes())
 
 
-async def publish_registry_bundle(http_host: str, http_port: int = 80) -> bool:
+async def publish_registry_bundle(
+    http_host: str,
+    http_port: int = 80,
+    client: httpx.AsyncClient | None = None,
+) -> bool:
     """Publish the registry bundle to CXDB via HTTP PUT.
 
     Args:
         http_host: CXDB HTTP gateway hostname.
         http_port: CXDB HTTP gateway port (default 9010).
+        client: HTTP client to reuse across publishes. If None, a client is
+                created for this call and closed afterwards.
 
     Returns:
         True if published successfully (201 or 204), False otherwise.
     """
-    bundle = load_bundle_json()
+    if client is None:
+        async with httpx.AsyncClient(timeout=10.0) as owned_client:
+            return await publish_registry_bundle(http_host, http_port, owned_client)
+
+    body = _bundle_bytes()
     url = f"http://{http_host}:{http_port}/v1/registry/bundles/{_BUNDLE_ID}"
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.put(
-                url,
-                json=bundle,
-                headers={"Content-Type": "application/json"},
+        response = await client.put(
+            url,
+            content=body,
+            headers={"Content-Type": "application/json"},
+        )
+        if response.status_code in (201, 204):
+            logger.info(f"Registry bundle published: {_BUNDLE_ID}")
+            return True
+        else:
+            logger.warning(
+                f"Registry publish unexpected status {response.status_code}: "
+                f"{response.text[:200]}"
             )
-            if response.status_code in (201, 204):
-                logger.info(f"Registry bundle published: {_BUNDLE_ID}")
-                return True
-            else:
-                logger.warning(
-                    f"Registry publish unexpected status {response.status_code}: "
-                    f"{response.text[:200]}"
-                )
-                return False
+            return False
     except httpx.HTTPError as e:
         logger.warning(f"Registry publish failed: {e}")
         return False
 
 
-# UUID v4 pattern for detecting root session IDs
-_UUID_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
-
-
+@lru_cache(maxsize=4096)
 def extract_agent_name(session_id: str) -> str | None:
     """Parse agent name from a child session ID.
 
+    Cached per session ID; a process only ever sees a bounded set of them.
+
     Child session IDs encode the agent name after the last underscore:
         {parent_span}-{child_span}_{agent_name}
 
@@ -327,13 +358,10 @@ def extract_agent_name(session_id: str) -> str | None:
     Returns:
         Agent name string, or None for root sessions.
     """
+    # Root UUIDs don't have underscores, so no pattern match is needed
     if not session_id or "_" not in session_id:
         return None
 
-    # Root UUIDs don't have underscores
-    if _UUID_RE.match(session_id):
-        return None
-
     # Extract agent name from after the last underscore
     parts = session_id.rsplit("_", 1)
     if len(parts) == 2 and parts[1]:
@@ -342,6 +370,40 @@ def extract_agent_name(session_id: str) -> str | None:
     return None
 
 
+@lru_cache(maxsize=1024)
+def _system_item_header(event_name: str, agent_name: str | None) -> tuple[str, str]:
+    """Return the (kind, title) pair for an event's SystemMessage.
+
+    Both depend only on the event name and agent, so they are computed
+    once per distinct pair instead of on every event.
+    """
+    # Determine the kind based on event category
+    if "error" in event_name:
+        kind = "error"
+    elif event_name.startswith("session:") or event_name.startswith("execution:"):
+        kind = "lifecycle"
+    elif "llm:" in event_name or "provider:" in event_name:
+        kind = "llm"
+    elif "tool:" in event_name:
+        kind = "tool"
+    else:
+        kind = "info"
+
+    # Build the title with optional agent/session context
+    title = event_name
+    if agent_name:
+        title = f"[{agent_name}] {event_name}"
+
+    return kind, title
+
+
+# Tags shared by every system item; copied per event instead of rebuilt
+_SYSTEM_ITEM_SKELETON: dict[int, object] = {
+    TAG_ITEM_TYPE: "system",
+    TAG_STATUS: "complete",
+}
+
+
 def build_event_as_system_item(
     event_name: str,
     data: dict,
@@ -376,18 +438,7 @@ def build_event_as_system_item(
         Dict with integer keys matching cxdb.ConversationItem v3.
     """
     ts = _ts_ms()
-
-    # Determine the kind based on event category
-    if "error" in event_name:
-        kind = "error"
-    elif event_name.startswith("session:") or event_name.startswith("execution:"):
-        kind = "lifecycle"
-    elif "llm:" in event_name or "provider:" in event_name:
-        kind = "llm"
-    elif "tool:" in event_name:
-        kind = "tool"
-    else:
-        kind = "info"
+    kind, title = _system_item_header(event_name, agent_name)
 
     # Build a readable content summary from the event data
     filtered = {
@@ -399,21 +450,14 @@ def build_event_as_system_item(
     if len(content_str) > 4000:
         content_str = content_str[:4000] + "..."
 
-    # Build the title with optional agent/session context
-    title = event_name
-    if agent_name:
-        title = f"[{agent_name}] {event_name}"
-
-    item: dict[int, object] = {
-        TAG_ITEM_TYPE: "system",
-        TAG_STATUS: "complete",
-        TAG_TIMESTAMP: ts,
-        TAG_ID: _make_item_id(session_id, event_name, ts),
-        TAG_SYSTEM: {
-            SM_TAG_KIND: kind,
-            SM_TAG_TITLE: title,
-            SM_TAG_CONTENT: content_str,
-        },
+    # Copy the static tags, then fill in the rest in ascending tag order
+    item = _SYSTEM_ITEM_SKELETON.copy()
+    item[TAG_TIMESTAMP] = ts
+    item[TAG_ID] = _make_item_id(session_id, event_name, ts)
+    item[TAG_SYSTEM] = {
+        SM_TAG_KIND: kind,
+        SM_TAG_TITLE: title,
+        SM_TAG_CONTENT: content_str,
     }
 
     return item
@@ -430,8 +474,7 @@ def serialize_envelope(envelope: dict[int, object]) -> bytes:
     Returns:
         Msgpack-encoded bytes.
     """
-    sorted_envelope = dict(sorted(envelope.items()))
-    return msgpack.packb(sorted_envelope, use_bin_type=True)
+    return pack_payload(envelope)
 
 
 def calculate_payload_bytes(envelope: dict[int, object]) -> int:
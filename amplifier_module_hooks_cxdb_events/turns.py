@@ -2,13 +2,34 @@
 
 from __future__ import annotations
 
+import hashlib
+import itertools
 import logging
+import reprlib
+import sys
+import time
 from dataclasses import dataclass, field
 
 logger = logging.getLogger(__name__)
 
+# Tags shared by every item of a variant; copied per turn instead of rebuilt
+_USER_ITEM_SKELETON: dict[int, object] = {1: "user_input", 2: "complete"}
+_ASSISTANT_ITEM_SKELETON: dict[int, object] = {1: "assistant_turn", 2: "complete"}
 
-@dataclass
+# Metrics dict key -> cxdb.TurnMetrics v3 tag, in ascending tag order
+_METRIC_TAGS = (
+    ("input_tokens", 1),
+    ("output_tokens", 2),
+    ("total_tokens", 3),
+    ("cached_tokens", 4),
+    ("reasoning_tokens", 5),
+    ("duration_ms", 6),
+    ("model", 7),
+    ("provider", 8),
+)
+
+
+@dataclass(slots=True)
 class ToolCallRecord:
     """Record of a single tool invocation during an orchestrator cycle."""
 
@@ -20,7 +41,7 @@ class ToolCallRecord:
     has_result: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class AccumulatedTurn:
     """Data accumulated during one orchestrator cycle (prompt -> response)."""
 
@@ -47,8 +68,15 @@ class TurnAccumulator:
 
     def __init__(self) -> None:
         self._current = AccumulatedTurn()
+        # Set once the current turn has a prompt, text block or tool call
+        self._has_data = False
         self._execution_ended = False
-        self._request_start_mono: float | None = None
+        self._request_start_ns: int | None = None
+        # Tool call records of the current turn, stacked per call_id and per
+        # tool_name so tool:post finds its record without scanning the turn.
+        # Completed records are skipped (and discarded) when popped.
+        self._calls_by_id: dict[str, list[ToolCallRecord]] = {}
+        self._calls_by_name: dict[str, list[ToolCallRecord]] = {}
 
     def on_prompt_submit(self, data: dict) -> None:
         """Buffer user message from prompt:submit event.
@@ -59,6 +87,7 @@ class TurnAccumulator:
         prompt = data.get("prompt")
         if prompt is not None:
             self._current.user_prompt = str(prompt)
+            self._has_data = True
             # Reset execution_ended for new cycle
             self._execution_ended = False
 
@@ -68,23 +97,21 @@ class TurnAccumulator:
         Args:
             data: Event data with tool_name, tool_input, etc.
         """
-        tool_name = data.get("tool_name", "unknown")
+        tool_name = _tool_name(data)
         tool_input = data.get("tool_input", {})
         # Amplifier uses "tool_call_id", some events use "call_id"
         call_id = data.get("tool_call_id") or data.get("call_id")
 
-        # Create abbreviated input summary
-        if isinstance(tool_input, dict):
-            summary = str(tool_input)[:200]
-        else:
-            summary = str(tool_input)[:200]
-
         record = ToolCallRecord(
             tool_name=tool_name,
-            input_summary=summary,
+            input_summary=_truncated(tool_input, _INPUT_SUMMARY_REPR),
             call_id=call_id,
         )
         self._current.tool_calls.append(record)
+        self._has_data = True
+        if call_id:
+            self._calls_by_id.setdefault(call_id, []).append(record)
+        self._calls_by_name.setdefault(tool_name, []).append(record)
 
     def on_tool_post(self, data: dict) -> None:
         """Complete a tool call record from tool:post event.
@@ -95,31 +122,24 @@ class TurnAccumulator:
         Args:
             data: Event data with tool_name, result, etc.
         """
-        tool_name = data.get("tool_name", "unknown")
+        tool_name = _tool_name(data)
         call_id = data.get("tool_call_id") or data.get("call_id")
         result = data.get("result")
         error = data.get("error")
 
-        # Try matching by call_id first (handles parallel same-tool calls)
-        if call_id:
-            for record in reversed(self._current.tool_calls):
-                if record.call_id == call_id and not record.has_result:
-                    record.has_result = True
-                    if result is not None:
-                        record.result = str(result)[:500]
-                    if error is not None:
-                        record.error = str(error)[:500]
-                    return
-
-        # Fall back to tool_name matching (for events without call_id)
-        for record in reversed(self._current.tool_calls):
-            if record.tool_name == tool_name and not record.has_result:
-                record.has_result = True
-                if result is not None:
-                    record.result = str(result)[:500]
-                if error is not None:
-                    record.error = str(error)[:500]
-                return
+        # Try matching by call_id first (handles parallel same-tool calls),
+        # then fall back to tool_name matching (for events without call_id)
+        record = _pop_open(self._calls_by_id, call_id) if call_id else None
+        if record is None:
+            record = _pop_open(self._calls_by_name, tool_name)
+        if record is None:
+            return
+
+        record.has_result = True
+        if result is not None:
+            record.result = _truncated(result, _RESULT_REPR)
+        if error is not None:
+            record.error = _truncated(error, _RESULT_REPR)
 
     def on_content_block_end(self, data: dict) -> None:
         """Accumulate assistant text block from content_block:end event.
@@ -135,31 +155,27 @@ class TurnAccumulator:
             data: Event data with block_type and/or block fields.
         """
         block = data.get("block")
-
-        # Determine block type from either top-level field or nested block.type
         block_type = data.get("block_type")
-        if block_type is None and isinstance(block, dict):
-            block_type = block.get("type")
-
-        if block_type != "text":
-            return
 
-        # Extract text from either a dict block or a plain string
+        # The top-level block_type wins; a dict block may carry its own type
         if isinstance(block, dict):
+            if block_type is None:
+                block_type = block.get("type")
+            if block_type != "text":
+                return
             text = block.get("text", "")
-        elif block is not None:
-            text = str(block)
-        else:
+        elif block_type != "text" or block is None:
             return
+        else:
+            text = str(block)
 
         if text:
             self._current.assistant_text_blocks.append(text)
+            self._has_data = True
 
     def on_provider_request(self, data: dict) -> None:
         """Capture start time for latency measurement."""
-        import time
-
-        self._request_start_mono = time.monotonic()
+        self._request_start_ns = time.monotonic_ns()
 
     def on_provider_response(self, data: dict) -> None:
         """Capture metrics from provider:response event.
@@ -170,24 +186,15 @@ class TurnAccumulator:
         Args:
             data: Event data with usage, provider, model fields.
         """
-        usage = data.get("usage", {})
+        usage = data.get("usage")
         if not usage:
             return
 
-        # Calculate total input tokens (Anthropic-aware)
-        input_tokens = usage.get("input_tokens", 0) or 0
-        cache_read = usage.get("cache_read_input_tokens", 0) or 0
-        cache_creation = usage.get("cache_creation_input_tokens", 0) or 0
-        total_input = input_tokens + cache_read + cache_creation
-
-        output_tokens = usage.get("output_tokens", 0) or 0
-        reasoning_tokens = (
-            usage.get("reasoning_tokens", 0) or usage.get("thinking_tokens", 0) or 0
+        provider = data.get("provider", "")
+        input_tokens, cache_read, cache_creation, output_tokens, reasoning_tokens = (
+            _usage_counts(usage)
         )
-        # Check nested OpenAI-style reasoning tokens
-        completion_details = usage.get("completion_tokens_details", {})
-        if completion_details and not reasoning_tokens:
-            reasoning_tokens = completion_details.get("reasoning_tokens", 0) or 0
+        total_input = input_tokens + cache_read + cache_creation
 
         self._current.metrics = {
             "input_tokens": input_tokens,
@@ -199,16 +206,14 @@ class TurnAccumulator:
             "reasoning_tokens": reasoning_tokens,
             "cached_tokens": cache_read,
             "model": data.get("model") or usage.get("model", ""),
-            "provider": data.get("provider", ""),
+            "provider": provider,
         }
 
         # Compute wall-clock latency if provider:request was seen
-        if self._request_start_mono is not None:
-            import time
-
-            duration_ms = int((time.monotonic() - self._request_start_mono) * 1000)
+        if self._request_start_ns is not None:
+            duration_ms = (time.monotonic_ns() - self._request_start_ns) // 1_000_000
             self._current.metrics["duration_ms"] = duration_ms
-            self._request_start_mono = None
+            self._request_start_ns = None
 
     def on_execution_end(self) -> None:
         """Mark execution as ended for straggler suppression."""
@@ -237,18 +242,15 @@ class TurnAccumulator:
             AccumulatedTurn if there is data to flush, None if empty.
         """
         turn = self._current
-
-        # Check if there's anything meaningful to flush
-        has_data = (
-            turn.user_prompt is not None
-            or turn.assistant_text_blocks
-            or turn.tool_calls
-        )
+        has_data = self._has_data
 
         # Reset state
         self._current = AccumulatedTurn()
+        self._has_data = False
         self._execution_ended = False
-        self._request_start_mono = None
+        self._request_start_ns = None
+        self._calls_by_id = {}
+        self._calls_by_name = {}
 
         return turn if has_data else None
 
@@ -276,24 +278,18 @@ class TurnAccumulator:
             List of msgpack-ready dicts (0-2 items).
         """
         items: list[dict[int, object]] = []
-        import hashlib
-        import time
-
-        timestamp_ms = int(time.time() * 1000)
+        timestamp_ms = time.time_ns() // 1_000_000
 
         def _make_id(label: str) -> str:
             raw = f"{label}:{timestamp_ms}"
-            return hashlib.sha256(raw.encode()).hexdigest()[:24]
+            return hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()
 
         # User input item
         if turn.user_prompt is not None:
-            user_item: dict[int, object] = {
-                1: "user_input",
-                2: "complete",
-                3: timestamp_ms,
-                4: _make_id("user_input"),
-                10: {1: turn.user_prompt},  # UserInput.text
-            }
+            user_item = _USER_ITEM_SKELETON.copy()
+            user_item[3] = timestamp_ms
+            user_item[4] = _make_id("user_input")
+            user_item[10] = {1: turn.user_prompt}  # UserInput.text
             items.append(user_item)
 
         # Assistant turn item
@@ -322,13 +318,10 @@ class TurnAccumulator:
             if turn.finish_reason:
                 assistant_turn[8] = turn.finish_reason  # AssistantTurn.finish_reason
 
-            assistant_item: dict[int, object] = {
-                1: "assistant_turn",
-                2: "complete",
-                3: timestamp_ms,
-                4: _make_id("assistant_turn"),
-                11: assistant_turn,  # ConversationItem.turn
-            }
+            assistant_item = _ASSISTANT_ITEM_SKELETON.copy()
+            assistant_item[3] = timestamp_ms
+            assistant_item[4] = _make_id("assistant_turn")
+            assistant_item[11] = assistant_turn  # ConversationItem.turn
             items.append(assistant_item)
 
         return items
@@ -351,21 +344,127 @@ class TurnAccumulator:
     @staticmethod
     def _build_metrics(metrics: dict) -> dict[int, object]:
         """Build a TurnMetrics dict matching cxdb.TurnMetrics v3 tags."""
-        m: dict[int, object] = {}
-        if "input_tokens" in metrics:
-            m[1] = metrics["input_tokens"]
-        if "output_tokens" in metrics:
-            m[2] = metrics["output_tokens"]
-        if "total_tokens" in metrics:
-            m[3] = metrics["total_tokens"]
-        if "cached_tokens" in metrics:
-            m[4] = metrics["cached_tokens"]
-        if "reasoning_tokens" in metrics:
-            m[5] = metrics["reasoning_tokens"]
-        if "duration_ms" in metrics:
-            m[6] = metrics["duration_ms"]
-        if "model" in metrics:
-            m[7] = metrics["model"]
-        if "provider" in metrics:
-            m[8] = metrics["provider"]
-        return m
+        return {tag: metrics[key] for key, tag in _METRIC_TAGS if key in metrics}
+
+
+# Shared read-only default for optional nested dicts; never mutate
+_EMPTY: dict = {}
+
+# (input, cache_read, cache_creation, output, reasoning) token counts
+_Usage = tuple[int, int, int, int, int]
+
+
+def _usage_counts(usage: dict) -> _Usage:
+    """Normalize usage from any provider by probing every known key."""
+    # .get(key) or 0 covers both missing keys and explicit None values
+    get = usage.get
+    return (
+        get("input_tokens") or 0,
+        get("cache_read_input_tokens") or 0,
+        get("cache_creation_input_tokens") or 0,
+        get("output_tokens") or 0,
+        get("reasoning_tokens")
+        or get("thinking_tokens")
+        # Nested OpenAI-style reasoning tokens
+        or (get("completion_tokens_details") or _EMPTY).get("reasoning_tokens")
+        or 0,
+    )
+
+
+def _tool_name(data: dict) -> str:
+    """Tool name of a tool event, interned: the same few names recur every turn.
+
+    Interned names share one string object across records and match the call
+    index by identity.
+    """
+    tool_name = data.get("tool_name", "unknown")
+    return sys.intern(tool_name) if type(tool_name) is str else tool_name
+
+
+def _pop_open(
+    index: dict[str, list[ToolCallRecord]], key: str
+) -> ToolCallRecord | None:
+    """Pop the most recent tool call under key that has no result yet."""
+    stack = index.get(key)
+    while stack:
+        record = stack.pop()
+        if not record.has_result:
+            return record
+    return None
+
+
+# Nesting depth rendered by _BoundedRepr; each level costs several Python
+# frames, so this stays well inside the recursion limit
+_MAX_REPR_DEPTH = 32
+
+
+class _BoundedRepr(reprlib.Repr):
+    """reprlib.Repr whose output starts exactly like str() for limit chars.
+
+    Every container item costs at least two characters, so items past
+    limit // 2 lie beyond the cap and are elided. Leaf strings are cut at the
+    end rather than in the middle, numbers and other leaves are never elided,
+    and dicts keep their insertion order (the stock repr_dict sorts keys;
+    str(dict) does not). Only containers nested deeper than _MAX_REPR_DEPTH
+    differ from str(): they are shown as "...".
+    """
+
+    def __init__(self, limit: int) -> None:
+        super().__init__()
+        self.maxstring = limit
+        self.maxlong = self.maxother = sys.maxsize
+        self.maxdict = self.maxlist = self.maxtuple = limit // 2
+        self.maxlevel = _MAX_REPR_DEPTH
+
+    def repr1(self, x: object, level: int) -> str:
+        # The base class dispatches on the exact type name, so subclasses
+        # (OrderedDict, defaultdict, ...) would fall back to a full repr()
+        if isinstance(x, dict):
+            return self.repr_dict(x, level)
+        if isinstance(x, list):
+            return self.repr_list(x, level)
+        if isinstance(x, tuple):
+            return self.repr_tuple(x, level)
+        if isinstance(x, str):
+            return self.repr_str(x, level)
+        return super().repr1(x, level)
+
+    def repr_str(self, x: str, level: int) -> str:
+        return repr(x[: self.maxstring])
+
+    def repr_dict(self, x: dict, level: int) -> str:
+        if not x:
+            return "{}"
+        if level <= 0:
+            return "{" + self.fillvalue + "}"
+        repr1 = self.repr1
+        pieces = [
+            f"{repr1(key, level - 1)}: {repr1(value, level - 1)}"
+            for key, value in itertools.islice(x.items(), self.maxdict)
+        ]
+        if len(x) > self.maxdict:
+            pieces.append(self.fillvalue)
+        return "{" + ", ".join(pieces) + "}"
+
+
+# Formatters for tool input summaries and tool results/errors; maxstring is
+# the final length cap
+_INPUT_SUMMARY_REPR = _BoundedRepr(200)
+_RESULT_REPR = _BoundedRepr(500)
+
+
+def _truncated(value: object, formatter: _BoundedRepr) -> str:
+    """Return str(value) capped at formatter.maxstring characters.
+
+    Dicts, lists and tuples go through the bounded formatter, so a large tool
+    payload is never rendered in full only to be sliced afterwards. The
+    result is str(value)[:limit], except that containers nested more than
+    _MAX_REPR_DEPTH levels deep are shown as "...", and a leaf string cut
+    at the cap may be quoted differently from its full repr.
+    """
+    limit = formatter.maxstring
+    if isinstance(value, str):
+        return value[:limit]
+    if isinstance(value, (dict, list, tuple)):
+        return formatter.repr(value)[:limit]
+    return str(value)[:limit]
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 
 
 @dataclass(frozen=True)
@@ -103,8 +104,8 @@ EVENT_TYPE_MAP: dict[str, CXDBType] = {
 # --- Variant Deduplication ---
 
 # Events that have :debug and :raw variants.
-# Preference order: :raw > :debug > base (higher index = richer)
-_VARIANT_SUFFIXES = [":raw", ":debug"]
+# Preference order: :raw > :debug > base (higher rank = richer)
+_VARIANT_RANKS = {"raw": 2, "debug": 1}
 
 # Base events that have variants
 _EVENTS_WITH_VARIANTS = {
@@ -115,6 +116,34 @@ _EVENTS_WITH_VARIANTS = {
     "llm:response",
 }
 
+# Every base event with variants plus each of its variant names
+_ALL_VARIANT_NAMES = frozenset(
+    f"{base}{suffix}"
+    for base in _EVENTS_WITH_VARIANTS
+    for suffix in ("", *(f":{tail}" for tail in _VARIANT_RANKS))
+)
+
+
+def _classify(event_name: str) -> tuple[str, int, bool]:
+    """Compute (base_event, variant_rank, has_variants) for an event name."""
+    head, sep, tail = event_name.rpartition(":")
+    rank = _VARIANT_RANKS.get(tail, 0) if sep else 0
+    base = head if rank else event_name
+    return base, rank, base in _EVENTS_WITH_VARIANTS
+
+
+# Classification of every mapped event, so the hot path is one dict lookup;
+# unknown events are classified on the fly
+_EVENT_INFO: dict[str, tuple[str, int, bool]] = {
+    event: _classify(event) for event in EVENT_TYPE_MAP
+}
+
+
+def _event_info(event_name: str) -> tuple[str, int, bool]:
+    """Return (base_event, variant_rank, has_variants) for an event name."""
+    info = _EVENT_INFO.get(event_name)
+    return _classify(event_name) if info is None else info
+
 
 def get_cxdb_type(event_name: str) -> CXDBType:
     """Return the CXDB type for an Amplifier event.
@@ -145,10 +174,7 @@ def get_base_event(event_name: str) -> str:
         >>> get_base_event("tool:post")
         'tool:post'
     """
-    for suffix in _VARIANT_SUFFIXES:
-        if event_name.endswith(suffix):
-            return event_name[: -len(suffix)]
-    return event_name
+    return _event_info(event_name)[0]
 
 
 def has_variants(event_name: str) -> bool:
@@ -160,8 +186,7 @@ def has_variants(event_name: str) -> bool:
     Returns:
         True if this event has :debug/:raw variants.
     """
-    base = get_base_event(event_name)
-    return base in _EVENTS_WITH_VARIANTS
+    return event_name in _ALL_VARIANT_NAMES
 
 
 def _variant_rank(event_name: str) -> int:
@@ -169,11 +194,51 @@ def _variant_rank(event_name: str) -> int:
 
     :raw = 2, :debug = 1, base = 0
     """
-    if event_name.endswith(":raw"):
-        return 2
-    if event_name.endswith(":debug"):
-        return 1
-    return 0
+    return _event_info(event_name)[1]
+
+
+def _decide(event_name: str, best_variant: dict[str, str]) -> bool:
+    """Compute should_process() for an event name from a variant map."""
+    base, _, variants = _event_info(event_name)
+    if not variants:
+        return True
+
+    best = best_variant.get(base)
+    if best is None:
+        # Unknown variant family -- process it
+        return True
+
+    return event_name == best
+
+
+@lru_cache(maxsize=8)
+def _variant_tables(
+    events: tuple[str, ...],
+) -> tuple[dict[str, str], dict[str, bool]]:
+    """Pre-compute the best variant map and decisions for a set of events.
+
+    For each event family with variants, determines which registered
+    variant is richest and stores that as the one to accept. Cached because
+    every hook in a process registers the same events; the returned dicts
+    are shared, so callers must copy before mutating.
+
+    Args:
+        events: All registered event names.
+
+    Returns:
+        (base_event -> best full event name, event name -> should_process).
+    """
+    best_variant: dict[str, str] = {}
+    best_rank: dict[str, int] = {}
+    for event in events:
+        base, rank, variants = _event_info(event)
+        if not variants:
+            continue
+        if rank > best_rank.get(base, -1):
+            best_rank[base] = rank
+            best_variant[base] = event
+    decisions = {event: _decide(event, best_variant) for event in events}
+    return best_variant, decisions
 
 
 class VariantDeduplicator:
@@ -191,29 +256,14 @@ class VariantDeduplicator:
     """
 
     def __init__(self, known_events: list[str] | None = None) -> None:
-        # Maps base_event -> best full event name to accept
+        # Maps base_event -> best full event name to accept (shared, read-only)
         self._best_variant: dict[str, str] = {}
+        # Memoized should_process() result per event name; bounded by the
+        # set of registered event names, prefilled for the known ones
+        self._decisions: dict[str, bool] = {}
         if known_events:
-            self._build_variant_map(known_events)
-
-    def _build_variant_map(self, events: list[str]) -> None:
-        """Pre-compute the best variant for each base event.
-
-        For each event family with variants, determines which registered
-        variant is richest and stores that as the one to accept.
-
-        Args:
-            events: All registered event names.
-        """
-        best_rank: dict[str, int] = {}
-        for event in events:
-            base = get_base_event(event)
-            if not has_variants(event):
-                continue
-            rank = _variant_rank(event)
-            if rank > best_rank.get(base, -1):
-                best_rank[base] = rank
-                self._best_variant[base] = event
+            self._best_variant, decisions = _variant_tables(tuple(known_events))
+            self._decisions = decisions.copy()
 
     def should_process(self, event_name: str) -> bool:
         """Check if this event should be processed.
@@ -228,13 +278,8 @@ class VariantDeduplicator:
         Returns:
             True if the event should be processed.
         """
-        if not has_variants(event_name):
-            return True
-
-        base = get_base_event(event_name)
-        best = self._best_variant.get(base)
-        if best is None:
-            # Unknown variant family -- process it
-            return True
-
-        return event_name == best
+        decision = self._decisions.get(event_name)
+        if decision is None:
+            decision = _decide(event_name, self._best_variant)
+            self._decisions[event_name] = decision
+        return decision
@@ -4,9 +4,10 @@ from __future__ import annotations
 
 import asyncio
 import struct
+import threading
+from types import SimpleNamespace
 
 import pytest
-import pytest_asyncio
 from unittest.mock import AsyncMock, MagicMock
 
 from amplifier_module_hooks_cxdb_events.protocol import (
@@ -18,8 +19,38 @@ from amplifier_module_hooks_cxdb_events.protocol import (
     MSG_GET_HEAD,
     MSG_HELLO,
     encode_frame,
+    install_uvloop_policy,
 )
 
+_FRAME_HEADER = struct.Struct(FRAME_HEADER_FORMAT)
+_U64 = struct.Struct("<Q")
+_HELLO_RESP = struct.Struct("<QH")
+_HEAD_RESP = struct.Struct("<QI")
+_CTX_RESP = struct.Struct("<QQI")
+# APPEND_TURN ack with an all-zero content hash as 32 pad bytes
+_ACK_RESP = struct.Struct("<QQI32x")
+_READ_CHUNK = 1 << 16
+
+
+def _leading_u64(payload: bytes) -> int:
+    """First u64 LE of a payload, or 0 if it is too short."""
+    return _U64.unpack_from(payload)[0] if len(payload) >= 8 else 0
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--uvloop",
+        action="store_true",
+        default=False,
+        help='Run the async tests on uvloop (needs the "uvloop" extra).',
+    )
+
+
+def pytest_sessionstart(session):
+    """Switch to uvloop only on request; hosts mount into the default loop."""
+    if session.config.getoption("uvloop") and not install_uvloop_policy():
+        raise pytest.UsageError("--uvloop given but uvloop is not installed")
+
 
 @pytest.fixture
 def sample_event_data():
@@ -33,15 +64,78 @@ def sample_event_data():
 
 @pytest.fixture
 def mock_coordinator():
-    """Minimal mock of ModuleCoordinator."""
-    coordinator = MagicMock()
-    coordinator.session_id = "test-session-123"
-    coordinator.parent_id = None
-    coordinator.config = {"root_session_id": "test-session-123"}
-    coordinator.hooks = MagicMock()
-    coordinator.hooks.register = MagicMock()
-    coordinator.collect_contributions = AsyncMock(return_value=[])
-    return coordinator
+    """Minimal stand-in for ModuleCoordinator.
+
+    A plain namespace carries the fixed attributes; only the parts tests
+    assert on or reconfigure (hook registration, contributions) are mocks.
+    """
+    # Spec the registry to the real HookRegistry API (no register_many)
+    hooks = MagicMock(spec=["register", "unregister"])
+    hooks.register = MagicMock()
+    return SimpleNamespace(
+        session_id="test-session-123",
+        parent_id=None,
+        config={"root_session_id": "test-session-123"},
+        hooks=hooks,
+        collect_contributions=AsyncMock(return_value=[]),
+    )
+
+
+class _MockClientProtocol(asyncio.BufferedProtocol):
+    """One mock server connection, received straight into a reusable buffer."""
+
+    def __init__(self, server: MockCXDBServer) -> None:
+        self._server = server
+        self._transport: asyncio.Transport | None = None
+        self._buf = bytearray(_READ_CHUNK)
+        self._filled = 0
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self._transport = transport  # type: ignore[assignment]
+        self._server._transports.add(transport)
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self._server._transports.discard(self._transport)
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        return memoryview(self._buf)[self._filled :]
+
+    def buffer_updated(self, nbytes: int) -> None:
+        self._filled += nbytes
+        buf = self._buf
+
+        # Answer every complete frame received so far in one write
+        responses = []
+        offset = 0
+        while self._filled - offset >= FRAME_HEADER_SIZE:
+            payload_len, msg_type, _flags, request_id = _FRAME_HEADER.unpack_from(
+                buf, offset
+            )
+            start = offset + FRAME_HEADER_SIZE
+            end = start + payload_len
+            if end > self._filled:
+                break
+            response_payload = self._server._handle_message(
+                msg_type, bytes(buf[start:end])
+            )
+            # Echo back the same msg_type
+            responses.append(encode_frame(msg_type, request_id, response_payload))
+            offset = end
+
+        # The buffer is still exported to the transport, so compact and grow
+        # by copying rather than resizing it in place
+        if offset:
+            remaining = self._filled - offset
+            buf[:remaining] = buf[offset : self._filled]
+            self._filled = remaining
+        if self._filled >= FRAME_HEADER_SIZE:
+            needed = FRAME_HEADER_SIZE + _FRAME_HEADER.unpack_from(buf)[0]
+            if needed > len(buf):
+                self._buf = bytearray(needed)
+                self._buf[: self._filled] = buf[: self._filled]
+
+        if responses and self._transport is not None:
+            self._transport.writelines(responses)
 
 
 class MockCXDBServer:
@@ -50,101 +144,92 @@ class MockCXDBServer:
     def __init__(self) -> None:
         self.port: int = 0
         self._server: asyncio.AbstractServer | None = None
-        self._next_context_id: int = 100
-        self._next_turn_id: int = 1000
+        self._transports: set[asyncio.BaseTransport] = set()
+        self.reset()
+
+    def reset(self) -> None:
+        """Restart context and turn ID allocation from the initial values."""
+        self._next_context_id = 100
+        self._next_turn_id = 1000
 
     async def start(self) -> None:
-        self._server = await asyncio.start_server(self._handle_client, "127.0.0.1", 0)
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(
+            lambda: _MockClientProtocol(self), "127.0.0.1", 0
+        )
         addr = self._server.sockets[0].getsockname()
         self.port = addr[1]
 
     async def stop(self) -> None:
         if self._server:
             self._server.close()
+            # Drop clients that never hung up, or wait_closed() waits on them
+            for transport in list(self._transports):
+                transport.close()
             await self._server.wait_closed()
 
-    async def _handle_client(
-        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
-    ) -> None:
-        try:
-            while True:
-                # Read frame header
-                header_data = await reader.readexactly(FRAME_HEADER_SIZE)
-                payload_len, msg_type, _flags, request_id = struct.unpack(
-                    FRAME_HEADER_FORMAT, header_data
-                )
-
-                # Read payload
-                payload = b""
-                if payload_len > 0:
-                    payload = await reader.readexactly(payload_len)
-
-                # Handle message
-                response_payload = self._handle_message(msg_type, payload)
-
-                # Send response (echo back same msg_type)
-                response_frame = encode_frame(msg_type, request_id, response_payload)
-                writer.write(response_frame)
-                await writer.drain()
-
-        except (asyncio.IncompleteReadError, ConnectionResetError):
-            pass
-        finally:
-            writer.close()
-
     def _handle_message(self, msg_type: int, payload: bytes) -> bytes:
         if msg_type == MSG_HELLO:
             # Accept new format: protocol_version(u16) + tag_len(u16) + tag + meta_len(u32)
             # Return session_id(u64 LE) + protocol_version(u16 LE)
-            return struct.pack("<QH", 42, 1)
+            return _HELLO_RESP.pack(42, 1)
 
         if msg_type == MSG_GET_HEAD:
             # Read context_id(u64), return head_turn_id(u64) + head_depth(u32)
-            context_id = struct.unpack("<Q", payload[:8])[0] if len(payload) >= 8 else 0
-            return struct.pack("<QI", self._next_turn_id - 1, 0)
+            context_id = _leading_u64(payload)
+            return _HEAD_RESP.pack(self._next_turn_id - 1, 0)
 
         if msg_type == MSG_CTX_CREATE:
             # Read base_turn_id (u64 LE) from payload
-            base_turn_id = (
-                struct.unpack("<Q", payload[:8])[0] if len(payload) >= 8 else 0
-            )
+            base_turn_id = _leading_u64(payload)
             ctx_id = self._next_context_id
             self._next_context_id += 1
             turn_id = self._next_turn_id
             self._next_turn_id += 1
             # Response: context_id(u64) + head_turn_id(u64) + head_depth(u32)
-            return struct.pack("<QQI", ctx_id, turn_id, 0)
+            return _CTX_RESP.pack(ctx_id, turn_id, 0)
 
         if msg_type == MSG_CTX_FORK:
             # Read base_turn_id, return new_context_id + head_turn_id + head_depth
-            base_turn_id = (
-                struct.unpack("<Q", payload[:8])[0] if len(payload) >= 8 else 0
-            )
+            base_turn_id = _leading_u64(payload)
             ctx_id = self._next_context_id
             self._next_context_id += 1
-            return struct.pack("<QQI", ctx_id, base_turn_id, 1)
+            return _CTX_RESP.pack(ctx_id, base_turn_id, 1)
 
         if msg_type == MSG_APPEND_TURN:
             # Parse enough to extract context_id, return ACK
-            if len(payload) >= 8:
-                context_id = struct.unpack("<Q", payload[:8])[0]
-            else:
-                context_id = 0
+            context_id = _leading_u64(payload)
             turn_id = self._next_turn_id
             self._next_turn_id += 1
             depth = 1
             # ACK: context_id(u64) + new_turn_id(u64) + new_depth(u32) + content_hash(32)
-            dummy_hash = b"\x00" * 32
-            return struct.pack("<QQI", context_id, turn_id, depth) + dummy_hash
+            return _ACK_RESP.pack(context_id, turn_id, depth)
 
         # Unknown message type - return error
         return f"Unknown message type: {msg_type}".encode()
 
 
-@pytest_asyncio.fixture
-async def mock_tcp_server():
-    """Start a mock CXDB TCP server for testing."""
+@pytest.fixture(scope="session")
+def _mock_cxdb_server():
+    """One mock CXDB server for the whole run, served from its own thread.
+
+    Running it on a dedicated loop lets every test connect to it regardless
+    of which event loop pytest-asyncio gives that test.
+    """
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
     server = MockCXDBServer()
-    await server.start()
+    asyncio.run_coroutine_threadsafe(server.start(), loop).result()
     yield server
-    await server.stop()
+    asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+@pytest.fixture
+def mock_tcp_server(_mock_cxdb_server):
+    """The shared mock CXDB TCP server, with ID allocation reset per test."""
+    _mock_cxdb_server.reset()
+    return _mock_cxdb_server
@@ -67,7 +67,8 @@ class TestEventBufferOverflow:
         buf.enqueue(1, b"e4", "t")  # overflow 2
         assert buf.overflow_count == 2
 
-    def test_overflow_preserves_newest(self):
+    @pytest.mark.asyncio
+    async def test_overflow_preserves_newest(self):
         """After overflow, buffer contains the newest events."""
         buf = EventBuffer(max_size=2)
         buf.enqueue(1, b"old", "t")
@@ -80,11 +81,114 @@ class TestEventBufferOverflow:
             sent.append(payload)
             return (1, 0)
 
-        import asyncio
-        asyncio.get_event_loop().run_until_complete(buf.flush(capture))
+        await buf.flush(capture)
         assert sent == [b"mid", b"new"]
 
 
+class TestEventBufferRing:
+    @pytest.mark.asyncio
+    async def test_fifo_across_wraparound(self):
+        """FIFO order is kept after the ring wraps around several times."""
+        buf = EventBuffer(max_size=3)
+        sent = []
+
+        async def capture(ctx, payload, type_id, type_ver):
+            sent.append(payload)
+            return (1, 0)
+
+        for i in range(8):
+            buf.enqueue(1, f"e{i}".encode(), "t")
+        assert buf.size == 3
+        assert buf.overflow_count == 5
+        await buf.flush(capture)
+        assert sent == [b"e5", b"e6", b"e7"]
+
+    @pytest.mark.asyncio
+    async def test_partial_flush_then_refill(self):
+        """Slots freed by a partial flush are reused without reordering."""
+        buf = EventBuffer(max_size=3)
+        calls = 0
+        sent = []
+
+        async def flaky(ctx, payload, type_id, type_ver):
+            nonlocal calls
+            calls += 1
+            if calls == 2:
+                raise ConnectionError("down")
+            sent.append(payload)
+            return (1, 0)
+
+        buf.enqueue(1, b"a", "t")
+        buf.enqueue(1, b"b", "t")
+        buf.enqueue(1, b"c", "t")
+        await buf.flush(flaky)  # sends "a", fails on "b"
+        buf.enqueue(1, b"d", "t")
+        assert buf.size == 3
+        assert buf.overflow_count == 0
+        await buf.flush(flaky)
+        assert sent == [b"a", b"b", b"c", b"d"]
+
+    @pytest.mark.asyncio
+    async def test_capacity_is_exactly_max_size(self):
+        """Power-of-two slot rounding never lets the buffer exceed max_size."""
+        for max_size in (1, 4, 5, 1000):
+            buf = EventBuffer(max_size=max_size)
+            for i in range(max_size + 7):
+                buf.enqueue(1, str(i).encode(), "t")
+            assert buf.size == max_size
+            assert buf.overflow_count == 7
+            sent = []
+
+            async def capture_many(turns):
+                sent.extend(payload for _, payload, _, _ in turns)
+
+            await buf.flush_many(capture_many)
+            assert sent == [str(i).encode() for i in range(7, max_size + 7)]
+
+    def test_zero_capacity_drops_everything(self):
+        """A zero-sized buffer counts every event as overflow."""
+        buf = EventBuffer(max_size=0)
+        buf.enqueue(1, b"e1", "t")
+        assert buf.size == 0
+        assert buf.overflow_count == 1
+
+    @pytest.mark.asyncio
+    async def test_drop_newest_policy_keeps_earliest(self):
+        """With drop_newest, the earliest events survive overflow."""
+        buf = EventBuffer(max_size=2, overflow_policy="drop_newest")
+        buf.enqueue(1, b"first", "t")
+        buf.enqueue(1, b"second", "t")
+        buf.enqueue(1, b"third", "t")  # dropped
+        assert buf.size == 2
+        assert buf.overflow_count == 1
+        sent = []
+
+        async def capture(ctx, payload, type_id, type_ver):
+            sent.append(payload)
+
+        await buf.flush(capture)
+        assert sent == [b"first", b"second"]
+
+    def test_unknown_policy_rejected(self):
+        """An unknown overflow policy raises ValueError."""
+        with pytest.raises(ValueError, match="overflow policy"):
+            EventBuffer(max_size=2, overflow_policy="drop_random")
+
+    def test_negative_max_size_rejected(self):
+        """A negative max_size raises ValueError instead of a broken ring."""
+        with pytest.raises(ValueError, match="max_size"):
+            EventBuffer(max_size=-1)
+
+    def test_overflow_burst_logs_once(self, caplog):
+        """A burst of overflows logs a single warning, not one per 100 events."""
+        buf = EventBuffer(max_size=1)
+        with caplog.at_level("WARNING"):
+            for _ in range(1001):
+                buf.enqueue(1, b"e", "t")
+        assert buf.overflow_count == 1000
+        assert len(caplog.records) == 1
+
+
 class TestEventBufferFlush:
     @pytest.mark.asyncio
     async def test_flush_sends_all(self):
@@ -196,6 +300,113 @@ class TestEventBufferFlush:
         assert received == [(42, "amplifier.ToolEvent", 2)]
 
 
+class TestEventBufferFlushMany:
+    @pytest.mark.asyncio
+    async def test_sends_all_contexts_in_one_call(self):
+        """Every buffered event goes out in one call, in FIFO order."""
+        buf = EventBuffer(max_size=10)
+        calls = []
+
+        async def send_many(turns):
+            calls.append(turns)
+            return [(1, 0)] * len(turns)
+
+        buf.enqueue(1, b"a1", "t")
+        buf.enqueue(2, b"b1", "u", 3)
+        buf.enqueue(1, b"a2", "t")
+        count = await buf.flush_many(send_many)
+        assert count == 3
+        assert buf.size == 0
+        assert buf.total_sent == 3
+        assert calls == [[(1, b"a1", "t", 1), (2, b"b1", "u", 3), (1, b"a2", "t", 1)]]
+
+    @pytest.mark.asyncio
+    async def test_failure_keeps_everything(self):
+        """A failed send leaves the whole buffer for retry."""
+        buf = EventBuffer(max_size=10)
+
+        async def send_many(turns):
+            raise ConnectionError("CXDB unreachable")
+
+        buf.enqueue(1, b"a1", "t")
+        buf.enqueue(2, b"b1", "t")
+        assert await buf.flush_many(send_many) == 0
+        assert buf.size == 2
+        assert buf.total_sent == 0
+
+    @pytest.mark.asyncio
+    async def test_empty_buffer_skips_send(self):
+        """Nothing is sent when the buffer is empty."""
+        buf = EventBuffer(max_size=10)
+
+        async def send_many(turns):
+            raise AssertionError("should not be called")
+
+        assert await buf.flush_many(send_many) == 0
+
+
+class TestEventBufferFlushRace:
+    """Overflow while a send is in flight must not pop events it did not send."""
+
+    @staticmethod
+    def _buffer():
+        buf = EventBuffer(max_size=2)
+        buf.enqueue(1, b"a", "t")
+        buf.enqueue(1, b"b", "t")
+        return buf
+
+    @staticmethod
+    async def _remaining(buf):
+        payloads = []
+
+        async def send(context_id, payload, type_id, type_version):
+            payloads.append(payload)
+            return (1, 0)
+
+        await buf.flush(send)
+        return payloads
+
+    @pytest.mark.asyncio
+    async def test_flush(self):
+        """Events that evict the in-flight one are still sent."""
+        buf = self._buffer()
+        sent = []
+
+        async def send(context_id, payload, type_id, type_version):
+            sent.append(payload)
+            if payload == b"a":
+                buf.enqueue(1, b"c", "t")
+                buf.enqueue(1, b"d", "t")
+            return (1, 0)
+
+        await buf.flush(send)
+        assert sent == [b"a", b"c", b"d"]
+        assert buf.size == 0
+
+    @pytest.mark.asyncio
+    async def test_flush_many(self):
+        buf = self._buffer()
+
+        async def send_many(turns):
+            buf.enqueue(1, b"c", "t")
+            return [(1, 0)] * len(turns)
+
+        assert await buf.flush_many(send_many) == 2
+        assert await self._remaining(buf) == [b"c"]
+
+    @pytest.mark.asyncio
+    async def test_clear_during_flush_many(self):
+        buf = self._buffer()
+
+        async def send_many(turns):
+            buf.clear()
+            buf.enqueue(1, b"c", "t")
+            return [(1, 0)] * len(turns)
+
+        await buf.flush_many(send_many)
+        assert await self._remaining(buf) == [b"c"]
+
+
 class TestEventBufferClear:
     def test_clear_empties_buffer(self):
         """Clear removes all events."""
@@ -1,9 +1,17 @@
 """Tests for CXDBEventHook - main event router."""
 
+import asyncio
+
 import pytest
 
+from amplifier_module_hooks_cxdb_events import hook as hook_module
 from amplifier_module_hooks_cxdb_events.hook import CXDBEventHook
-from amplifier_module_hooks_cxdb_events.protocol import CXDBTcpClient
+from amplifier_module_hooks_cxdb_events import protocol as protocol_mod
+from amplifier_module_hooks_cxdb_events.protocol import (
+    CXDBTcpClient,
+    encode_append_turn,
+)
+from amplifier_module_hooks_cxdb_events.schema import serialize_envelope
 
 
 def _make_hook(
@@ -63,6 +71,30 @@ class TestHookInitialization:
         assert hook.turns_context_id is None
         assert hook.everything_context_id is None
 
+    @pytest.mark.asyncio
+    async def test_registry_published_once_per_process(
+        self, mock_tcp_server, monkeypatch
+    ):
+        """Concurrent hooks share a single registry publish per target."""
+        calls = []
+
+        async def fake_publish(host, port):
+            calls.append((host, port))
+            await asyncio.sleep(0)
+            return True
+
+        monkeypatch.setattr(hook_module, "publish_registry_bundle", fake_publish)
+        monkeypatch.setattr(CXDBEventHook, "_published_registries", set())
+        hooks = [_make_hook(mock_tcp_server) for _ in range(3)]
+        await asyncio.gather(*(hook.initialize() for hook in hooks))
+        # A hook created after the publish completed reuses it too
+        hooks.append(_make_hook(mock_tcp_server))
+        await hooks[-1].initialize()
+        assert calls == [("127.0.0.1", 19999)]
+        assert all(hook.initialized for hook in hooks)
+        for hook in hooks:
+            await hook.cleanup()
+
 
 class TestHookEventRouting:
     @pytest.mark.asyncio
@@ -86,6 +118,20 @@ class TestHookEventRouting:
         assert hook._turn_accumulator._current.tool_calls[0].has_result
         await hook.cleanup()
 
+    @pytest.mark.asyncio
+    async def test_provider_and_execution_events_routed(self, mock_tcp_server):
+        """provider:response and execution:end reach their accumulator handlers."""
+        hook = _make_hook(mock_tcp_server)
+        await hook.initialize()
+        await hook.handle_event(
+            "provider:response",
+            {"provider": "anthropic", "usage": {"input_tokens": 3, "output_tokens": 5}},
+        )
+        assert hook._turn_accumulator._current.metrics["output_tokens"] == 5
+        await hook.handle_event("execution:end", {})
+        assert hook._turn_accumulator.is_straggler("llm:response")
+        await hook.cleanup()
+
     @pytest.mark.asyncio
     async def test_orchestrator_complete_flushes_turns(self, mock_tcp_server):
         """orchestrator:complete triggers turn flush and dedup reset."""
@@ -102,7 +148,8 @@ class TestHookEventRouting:
 
     @pytest.mark.asyncio
     async def test_non_turn_events_go_to_everything_only(self, mock_tcp_server):
-        """Events not in _TURN_EVENTS go to everything context only."""
+        """Events without a turn handler go to everything context only."""
+        assert "cancel:requested" not in hook_module._TURN_DISPATCH
         hook = _make_hook(mock_tcp_server)
         await hook.initialize()
         result = await hook.handle_event("cancel:requested", {"level": "graceful"})
@@ -112,6 +159,167 @@ class TestHookEventRouting:
         await hook.cleanup()
 
 
+class TestHookWriteQueue:
+    @pytest.mark.asyncio
+    async def test_handle_event_does_not_wait_for_write(self, mock_tcp_server):
+        """Events are queued and written by the background writer task."""
+        hook = _make_hook(mock_tcp_server)
+        await hook.initialize()
+        await hook.handle_event("session:start", {"session_id": "test"})
+        await hook.handle_event("cancel:requested", {"level": "graceful"})
+        assert hook._queue.qsize() == 2
+        await asyncio.sleep(0.05)
+        assert hook._queue.empty()
+        assert hook._buffer.size == 0
+        await hook.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_buffered_turns_retried_with_next_write(self, mock_tcp_server):
+        """Turns left in the buffer piggyback on the next successful write."""
+        hook = _make_hook(mock_tcp_server)
+        await hook.initialize()
+        hook._buffer.enqueue(
+            hook.everything_context_id,
+            encode_append_turn(
+                hook.everything_context_id,
+                serialize_envelope({1: "system", 4: "buffered"}),
+                "cxdb.ConversationItem",
+                3,
+            ),
+            "cxdb.ConversationItem",
+            3,
+        )
+        await hook.handle_event("session:start", {"session_id": "test"})
+        await asyncio.sleep(0.05)
+        assert hook._buffer.size == 0
+        assert hook._buffer.total_sent == 1
+        await hook.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_failed_turns_not_rehashed_on_retry(
+        self, mock_tcp_server, monkeypatch
+    ):
+        """A failed write buffers encoded turns, so the retry sends them as-is."""
+        hook = _make_hook(mock_tcp_server)
+        await hook.initialize()
+        send = hook._client.append_encoded_turns
+
+        async def fail_once(turn_payloads):
+            monkeypatch.setattr(hook._client, "append_encoded_turns", send)
+            raise ConnectionError("boom")
+
+        monkeypatch.setattr(hook._client, "append_encoded_turns", fail_once)
+        await hook.handle_event("session:start", {"session_id": "test"})
+        await asyncio.sleep(0.05)
+        assert hook._buffer.size == 1
+
+        hashed = []
+        hash_payload = protocol_mod.hash_payload
+        monkeypatch.setattr(
+            protocol_mod,
+            "hash_payload",
+            lambda data: hashed.append(data) or hash_payload(data),
+        )
+        await hook.handle_event("cancel:requested", {"level": "graceful"})
+        await asyncio.sleep(0.05)
+        assert hook._buffer.size == 0
+        assert hook._buffer.total_sent == 1
+        assert len(hashed) == 1  # only the new event
+        await hook.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_newest(self, mock_tcp_server):
+        """With drop_newest, new events are dropped and counted when full."""
+        hook = CXDBEventHook(
+            client=CXDBTcpClient("127.0.0.1", mock_tcp_server.port),
+            config={
+                "cxdb_host": "127.0.0.1",
+                "cxdb_http_port": 19999,
+                "buffer_size": 1,
+                "overflow_policy": "drop_newest",
+            },
+            session_id="root-123",
+            parent_id=None,
+            root_session_id="root-123",
+        )
+        await hook.initialize()
+        hook._submit(1, b"first")
+        hook._submit(1, b"second")
+        assert [turn[1] for turn in hook._take_queued(2)] == [b"first"]
+        assert hook.dropped_count == 1
+        await hook.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_oldest(self, mock_tcp_server):
+        """With the default drop_oldest, the newest event replaces the oldest."""
+        hook = CXDBEventHook(
+            client=CXDBTcpClient("127.0.0.1", mock_tcp_server.port),
+            config={
+                "cxdb_host": "127.0.0.1",
+                "cxdb_http_port": 19999,
+                "buffer_size": 1,
+            },
+            session_id="root-123",
+            parent_id=None,
+            root_session_id="root-123",
+        )
+        await hook.initialize()
+        hook._submit(1, b"first")
+        hook._submit(1, b"second")
+        assert [turn[1] for turn in hook._take_queued(2)] == [b"second"]
+        assert hook.dropped_count == 1
+        await hook.cleanup()
+
+    def test_zero_buffer_size_keeps_queue_bounded(self):
+        """buffer_size 0 still bounds the write queue (asyncio's 0 is unbounded)."""
+        hook = CXDBEventHook(
+            client=CXDBTcpClient("127.0.0.1", 1),
+            config={"buffer_size": 0},
+            session_id="root-123",
+            parent_id=None,
+            root_session_id="root-123",
+        )
+        assert hook._queue.maxsize == 1
+        assert hook._buffer.max_size == 0
+
+    @pytest.mark.asyncio
+    async def test_full_queue_burst_logs_once(self, mock_tcp_server, caplog):
+        """A burst of queue-full drops logs a single warning."""
+        hook = CXDBEventHook(
+            client=CXDBTcpClient("127.0.0.1", mock_tcp_server.port),
+            config={
+                "cxdb_host": "127.0.0.1",
+                "cxdb_http_port": 19999,
+                "buffer_size": 1,
+            },
+            session_id="root-123",
+            parent_id=None,
+            root_session_id="root-123",
+        )
+        await hook.initialize()
+        with caplog.at_level("WARNING"):
+            for _ in range(201):
+                hook._submit(1, b"e")
+        assert hook.dropped_count == 200
+        assert [r.message for r in caplog.records if "queue full" in r.message] == [
+            "Write queue full: 1 events dropped (queue size: 1)"
+        ]
+        await hook.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_cleanup_drains_queue(self, mock_tcp_server):
+        """cleanup() writes everything still queued before closing."""
+        hook = _make_hook(mock_tcp_server)
+        await hook.initialize()
+        await hook.handle_event("prompt:submit", {"prompt": "hi"})
+        await hook.handle_event("orchestrator:complete", {"status": "success"})
+        assert not hook._queue.empty()
+        await hook.cleanup()
+        assert hook._queue.empty()
+        assert hook._buffer.size == 0
+        assert hook._writer_task is None
+
+
 class TestHookVariantDedup:
     @pytest.mark.asyncio
     async def test_raw_variant_processed(self, mock_tcp_server):
@@ -133,6 +341,26 @@ class TestHookVariantDedup:
         assert result.action == "continue"
         await hook.cleanup()
 
+    @pytest.mark.asyncio
+    async def test_suppressed_variant_not_queued(self, mock_tcp_server):
+        """Routing is computed once per event name and suppresses lesser variants."""
+        hook = CXDBEventHook(
+            client=CXDBTcpClient("127.0.0.1", mock_tcp_server.port),
+            config={"cxdb_host": "127.0.0.1", "cxdb_http_port": 19999},
+            session_id="root-123",
+            parent_id=None,
+            root_session_id="root-123",
+            known_events=["llm:request", "llm:request:debug", "llm:request:raw"],
+        )
+        await hook.initialize()
+        for _ in range(2):
+            await hook.handle_event("llm:request:debug", {})
+        assert hook._queue.empty()
+        assert hook._routes["llm:request:debug"] == (False, None, False)
+        await hook.handle_event("llm:request:raw", {})
+        assert hook._queue.qsize() == 1
+        await hook.cleanup()
+
 
 class TestHookStragglerSuppression:
     @pytest.mark.asyncio
@@ -164,6 +392,25 @@ class TestHookErrorHandling:
             assert result.action == "continue"
         await hook.cleanup()
 
+    @pytest.mark.asyncio
+    async def test_continue_result_is_shared(self, mock_tcp_server):
+        """The same continue result instance is returned for every event."""
+        hook = _make_hook(mock_tcp_server)
+        await hook.initialize()
+        first = await hook.handle_event("session:start", {"session_id": "test"})
+        second = await hook.handle_event("tool:pre", {"tool_name": "bash"})
+        assert first is second
+        assert first.action == "continue"
+        await hook.cleanup()
+
+    def test_continue_result_is_frozen(self):
+        """Mutating the shared continue result raises instead of leaking."""
+        result = hook_module._CONTINUE
+        assert isinstance(result, hook_module.HookResult)
+        with pytest.raises((AttributeError, ValueError)):
+            result.action = "deny"
+        assert result.action == "continue"
+
     @pytest.mark.asyncio
     async def test_buffers_when_not_initialized(self):
         """Events buffered when CXDB is unreachable."""
@@ -179,6 +426,30 @@ class TestHookErrorHandling:
         assert result.action == "continue"
         await hook.cleanup()
 
+    @pytest.mark.asyncio
+    async def test_no_items_built_without_contexts(self, monkeypatch):
+        """No envelopes are built while contexts are unavailable."""
+
+        built = []
+        monkeypatch.setattr(
+            hook_module,
+            "build_event_as_system_item",
+            lambda *args, **kwargs: built.append(args) or {},
+        )
+        hook = CXDBEventHook(
+            client=CXDBTcpClient("192.0.2.1", 9999, timeout=0.1),
+            config={"cxdb_host": "192.0.2.1"},
+            session_id="root-123",
+            parent_id=None,
+            root_session_id="root-123",
+        )
+        hook._initialized = True  # skip the connection attempt
+        await hook.handle_event("prompt:submit", {"prompt": "hi"})
+        await hook.handle_event("orchestrator:complete", {"status": "success"})
+        assert built == []
+        assert hook._queue.empty()
+        await hook.cleanup()
+
     @pytest.mark.asyncio
     async def test_lazy_initialization(self, mock_tcp_server):
         """Hook initializes lazily on first event."""
@@ -199,6 +470,27 @@ class TestHookCleanup:
         await hook.cleanup()
         assert not hook._client.connected
 
+    @pytest.mark.asyncio
+    async def test_cleanup_flushes_buffer(self, mock_tcp_server):
+        """Cleanup sends buffered events before closing the connection."""
+        hook = _make_hook(mock_tcp_server)
+        await hook.initialize()
+        for i in range(3):
+            hook._buffer.enqueue(
+                hook.everything_context_id,
+                encode_append_turn(
+                    hook.everything_context_id,
+                    serialize_envelope({1: "system", 4: f"buffered-{i}"}),
+                    "cxdb.ConversationItem",
+                    3,
+                ),
+                "cxdb.ConversationItem",
+                3,
+            )
+        await hook.cleanup()
+        assert hook._buffer.size == 0
+        assert hook._buffer.total_sent == 3
+
     @pytest.mark.asyncio
     async def test_cleanup_idempotent(self, mock_tcp_server):
         """Cleanup can be called multiple times safely."""
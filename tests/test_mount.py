@@ -4,7 +4,7 @@ import asyncio
 
 import pytest
 
-from amplifier_module_hooks_cxdb_events import mount
+from amplifier_module_hooks_cxdb_events import _client_tag, mount
 
 
 class TestMountNoop:
@@ -93,6 +93,22 @@ class TestMountExclusions:
         assert "artifact:read" not in registered
         assert "tool:post" in registered  # non-matching events still registered
 
+    @pytest.mark.asyncio
+    async def test_multiple_glob_exclusions(self, mock_coordinator):
+        """Several glob patterns (*, ?, [...]) combine with exact names."""
+        await mount(mock_coordinator, {
+            "cxdb_host": "localhost",
+            "exclude_events": ["artifact:*", "plan:?nd", "cancel:[rc]*", "session:end"],
+        })
+        registered = [call.args[0] for call in mock_coordinator.hooks.register.call_args_list]
+        assert "artifact:write" not in registered
+        assert "plan:end" not in registered
+        assert "plan:start" in registered
+        assert "cancel:requested" not in registered
+        assert "cancel:completed" not in registered
+        assert "session:end" not in registered
+        assert "session:start" in registered
+
     @pytest.mark.asyncio
     async def test_custom_exclusions_add_to_defaults(self, mock_coordinator):
         """Custom exclusions are added to defaults, not replacing them."""
@@ -119,6 +135,21 @@ class TestMountAdditionalEvents:
         assert "custom:my_event" in registered
         assert "custom:other" in registered
 
+    @pytest.mark.asyncio
+    async def test_events_registered_once(self, mock_coordinator):
+        """Events listed in several layers are registered exactly once."""
+        mock_coordinator.collect_contributions.return_value = [
+            ["custom:contributed", "tool:pre"],
+            "not-a-list",
+        ]
+        await mount(mock_coordinator, {
+            "cxdb_host": "localhost",
+            "additional_events": ["custom:contributed", "session:start"],
+        })
+        registered = [call.args[0] for call in mock_coordinator.hooks.register.call_args_list]
+        assert len(registered) == len(set(registered))
+        assert "custom:contributed" in registered
+
 
 class TestMountPriority:
     @pytest.mark.asyncio
@@ -158,3 +189,20 @@ class TestMountHookName:
         await mount(mock_coordinator, {"cxdb_host": "localhost"})
         for call in mock_coordinator.hooks.register.call_args_list:
             assert call.kwargs.get("name") == "cxdb-events"
+
+
+class TestMountClientTag:
+    @pytest.mark.asyncio
+    async def test_project_name_from_cwd(self, mock_coordinator, monkeypatch, tmp_path):
+        """Project name is the cwd basename, computed once per root session."""
+        _client_tag.cache_clear()
+        monkeypatch.chdir(tmp_path)
+        config = {"cxdb_host": "localhost"}
+        await mount(mock_coordinator, config)
+        assert config["_project_name"] == tmp_path.name
+        assert _client_tag("test-session-123") == (
+            tmp_path.name,
+            f"amplifier - {tmp_path.name} - test-session",
+        )
+        assert _client_tag.cache_info().hits == 1
+        _client_tag.cache_clear()
@@ -1,13 +1,20 @@
 """Tests for binary protocol frame encoding/decoding."""
 
+import asyncio
+import hashlib
+import socket
 import struct
+import sys
+import types
 
 import pytest
 
 import blake3 as blake3_mod
 import msgpack
 
+from amplifier_module_hooks_cxdb_events import protocol as protocol_mod
 from amplifier_module_hooks_cxdb_events.protocol import (
+    CXDBProtocolError,
     CXDBTcpClient,
     FRAME_HEADER_SIZE,
     MSG_APPEND_TURN,
@@ -17,11 +24,17 @@ from amplifier_module_hooks_cxdb_events.protocol import (
     MSG_GET_HEAD,
     MSG_HELLO,
     decode_frame,
+    encode_append_turn,
     encode_append_turn_payload,
     encode_frame,
+    encode_frame_header,
     generate_idempotency_key,
+    hash_payload,
+    install_uvloop_policy,
+    pack_payload,
     serialize_payload,
 )
+from amplifier_module_hooks_cxdb_events.schema import serialize_envelope
 
 
 class TestEncodeFrame:
@@ -66,6 +79,15 @@ class TestEncodeFrame:
         payload_len, _, _, _ = struct.unpack("<IHHQ", frame[:FRAME_HEADER_SIZE])
         assert payload_len == 5
 
+    def test_header_plus_payload_matches_frame(self):
+        """encode_frame_header + payload is byte-identical to encode_frame."""
+        payload = b"hello"
+        header = encode_frame_header(MSG_APPEND_TURN, 7, len(payload), flags=3)
+        assert len(header) == FRAME_HEADER_SIZE
+        assert header + payload == encode_frame(
+            MSG_APPEND_TURN, request_id=7, payload=payload, flags=3
+        )
+
 
 class TestDecodeFrame:
     def test_roundtrip(self):
@@ -149,6 +171,32 @@ class TestCXDBTcpClientConnect:
         with pytest.raises(ConnectionError):
             await client.connect()
 
+    @pytest.mark.asyncio
+    async def test_socket_tuned_on_connect(self, mock_tcp_server):
+        """TCP_NODELAY and a larger send buffer are applied on connect."""
+        client = CXDBTcpClient("127.0.0.1", mock_tcp_server.port)
+        await client.connect()
+        sock = client._transport.get_extra_info("socket")
+        assert sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+        # Linux reports double the requested size to account for bookkeeping
+        assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF) >= 1 << 16
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_socket_tuning_disabled(self, mock_tcp_server):
+        """Socket options can be switched off."""
+        client = CXDBTcpClient(
+            "127.0.0.1",
+            mock_tcp_server.port,
+            tcp_nodelay=False,
+            sndbuf_bytes=None,
+        )
+        await client.connect()
+        assert client.connected
+        sock = client._transport.get_extra_info("socket")
+        assert sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY) == 0
+        await client.close()
+
     @pytest.mark.asyncio
     async def test_close_disconnects(self, mock_tcp_server):
         """Close sets connected to False."""
@@ -167,6 +215,30 @@ class TestCXDBTcpClientConnect:
         await client.close()  # Should not raise
 
 
+class TestInstallUvloopPolicy:
+    def test_returns_false_without_uvloop(self, monkeypatch):
+        """Without uvloop installed, the current policy is left alone."""
+        monkeypatch.setitem(sys.modules, "uvloop", None)
+        policy = asyncio.get_event_loop_policy()
+        assert install_uvloop_policy() is False
+        assert asyncio.get_event_loop_policy() is policy
+
+    def test_installs_uvloop_policy(self, monkeypatch):
+        """With uvloop available, its policy becomes the event loop policy."""
+        fake_uvloop = types.ModuleType("uvloop")
+        fake_uvloop.EventLoopPolicy = asyncio.DefaultEventLoopPolicy
+        monkeypatch.setitem(sys.modules, "uvloop", fake_uvloop)
+        policy = asyncio.get_event_loop_policy()
+        try:
+            assert install_uvloop_policy() is True
+            assert isinstance(
+                asyncio.get_event_loop_policy(), asyncio.DefaultEventLoopPolicy
+            )
+            assert asyncio.get_event_loop_policy() is not policy
+        finally:
+            asyncio.set_event_loop_policy(policy)
+
+
 class TestHelloNewFormat:
     def test_client_tag_stored(self):
         """Client tag is stored on the client instance."""
@@ -248,6 +320,16 @@ class TestCXDBTcpClientContextOps:
         assert ctx1 != ctx2
         await client.close()
 
+    @pytest.mark.asyncio
+    async def test_create_contexts_pipelined(self, mock_tcp_server):
+        """create_contexts returns one unique context per request, in order."""
+        client = CXDBTcpClient("127.0.0.1", mock_tcp_server.port)
+        await client.connect()
+        contexts = await client.create_contexts(2)
+        assert len(contexts) == 2
+        assert contexts[0][0] < contexts[1][0]
+        await client.close()
+
     @pytest.mark.asyncio
     async def test_fork_context(self, mock_tcp_server):
         """MSG_CTX_FORK returns new context with correct types."""
@@ -333,8 +415,59 @@ class TestAppendTurnPayload:
         extracted_type_id = encoded[20 : 20 + type_id_len].decode("utf-8")
         assert extracted_type_id == type_id
 
+    def test_full_layout(self):
+        """Every field lands at its CLIENT_SPEC.md 5.1.2 position."""
+        msgpack_bytes, content_hash = serialize_payload({1: "test"})
+        type_id = b"cxdb.ConversationItem"
+        encoded = encode_append_turn_payload(
+            context_id=7,
+            msgpack_bytes=msgpack_bytes,
+            content_hash=content_hash,
+            declared_type_id=type_id.decode(),
+            declared_type_version=3,
+            parent_turn_id=9,
+        )
+        key = generate_idempotency_key(7, content_hash)
+        expected = (
+            struct.pack("<QQI", 7, 9, len(type_id))
+            + type_id
+            + struct.pack("<IIII", 3, 1, 0, len(msgpack_bytes))
+            + content_hash
+            + struct.pack("<I", len(msgpack_bytes))
+            + msgpack_bytes
+            + struct.pack("<I", len(key))
+            + key
+        )
+        assert encoded == expected
+
+    def test_encode_append_turn_hashes_payload(self):
+        """encode_append_turn() fills in the BLAKE3 hash of the msgpack bytes."""
+        msgpack_bytes, content_hash = serialize_payload({1: "test"})
+        assert encode_append_turn(
+            7, msgpack_bytes, "cxdb.ConversationItem", 3
+        ) == encode_append_turn_payload(
+            7, msgpack_bytes, content_hash, "cxdb.ConversationItem", 3
+        )
+
 
 class TestIdempotencyKey:
+    def test_matches_spec_formula(self):
+        """Key is SHA-256 of little-endian u64 context_id, b":", content hash."""
+        content_hash = blake3_mod.blake3(b"test_data").digest()
+        for context_id in (42, 2**40, 42):
+            expected = hashlib.sha256(
+                struct.pack("<Q", context_id) + b":" + content_hash
+            ).digest()
+            assert generate_idempotency_key(context_id, content_hash) == expected
+
+    def test_cached_prefix_state_is_not_mutated(self):
+        """Keys for one context do not leak into the next key for that context."""
+        hash1 = blake3_mod.blake3(b"data_a").digest()
+        hash2 = blake3_mod.blake3(b"data_b").digest()
+        generate_idempotency_key(7, hash1)
+        expected = hashlib.sha256(struct.pack("<Q", 7) + b":" + hash2).digest()
+        assert generate_idempotency_key(7, hash2) == expected
+
     def test_deterministic(self):
         """Same inputs produce same key."""
         content_hash = blake3_mod.blake3(b"test_data").digest()
@@ -387,6 +520,16 @@ class TestSerializePayload:
         _, content_hash = serialize_payload(payload)
         assert len(content_hash) == 32
 
+    def test_hash_payload_matches_blake3(self, monkeypatch):
+        """Reused and multithreaded hashers agree with a fresh BLAKE3 hasher."""
+        small = [b"first", b"second", b""]
+        for data in small:
+            assert hash_payload(data) == blake3_mod.blake3(data).digest()
+        monkeypatch.setattr(protocol_mod, "_BLAKE3_MT", True)
+        monkeypatch.setattr(protocol_mod, "_BLAKE3_MT_THRESHOLD", 16)
+        large = b"x" * 1024
+        assert hash_payload(large) == blake3_mod.blake3(large).digest()
+
     def test_deterministic_encoding(self):
         """Same payload produces same bytes (sorted keys)."""
         payload1 = {3: "c", 1: "a", 2: "b"}
@@ -396,6 +539,31 @@ class TestSerializePayload:
         assert bytes1 == bytes2
         assert hash1 == hash2
 
+    def test_pack_payload_matches_serialize_payload(self):
+        """pack_payload yields the same bytes serialize_payload hashes."""
+        payload = {3: "c", 1: "a", 2: {1: "nested"}}
+        msgpack_bytes, content_hash = serialize_payload(payload)
+        assert pack_payload(payload) == msgpack_bytes
+        assert blake3_mod.blake3(msgpack_bytes).digest() == content_hash
+
+    def test_matches_msgpack_reference_encoding(self):
+        """Encoded bytes are identical to msgpack.packb of the sorted payload."""
+        payload = {
+            3: "c" * 300,
+            1: -1,
+            2: {"k": [1, 2.5, None, True]},
+            4: 2**40,
+            5: b"raw",
+            6: "é",
+        }
+        expected = msgpack.packb(dict(sorted(payload.items())), use_bin_type=True)
+        assert pack_payload(payload) == expected
+
+    def test_buffered_envelope_matches_wire_bytes(self):
+        """Envelopes serialized for the buffer are sent byte-for-byte unchanged."""
+        envelope = {4: "id", 1: "system", 12: {1: "info", 2: "t", 3: "c"}}
+        assert serialize_envelope(envelope) == pack_payload(envelope)
+
     def test_nested_values(self):
         """Nested dicts and lists serialize correctly."""
         payload = {
@@ -445,6 +613,55 @@ class TestClientAppendTurn:
         assert tid2 > tid1
         await client.close()
 
+    @pytest.mark.asyncio
+    async def test_append_encoded_turns(self, mock_tcp_server):
+        """append_encoded_turns returns one (turn_id, depth) per turn, in order."""
+        client = CXDBTcpClient("127.0.0.1", mock_tcp_server.port)
+        await client.connect()
+        ctx_id, _, _ = await client.create_context()
+        results = await client.append_encoded_turns(
+            [
+                encode_append_turn(ctx_id, pack_payload({1: "event1"}), "t", 1),
+                encode_append_turn(ctx_id, pack_payload({1: "event2"}), "t", 1),
+                encode_append_turn(ctx_id, pack_payload({1: "event3"}), "u", 3),
+            ]
+        )
+        assert len(results) == 3
+        turn_ids = [turn_id for turn_id, _ in results]
+        assert turn_ids == sorted(turn_ids)
+        assert len(set(turn_ids)) == 3
+        # Connection stays usable after a batch
+        tid, _ = await client.append_turn(
+            context_id=ctx_id,
+            payload={1: "event4"},
+            declared_type_id="amplifier.GenericEvent",
+        )
+        assert tid > turn_ids[-1]
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_append_encoded_turns_multiple_contexts(self, mock_tcp_server):
+        """Turns for different contexts share one write."""
+        client = CXDBTcpClient("127.0.0.1", mock_tcp_server.port)
+        await client.connect()
+        (ctx1, _, _), (ctx2, _, _) = await client.create_contexts(2)
+        results = await client.append_encoded_turns(
+            [
+                encode_append_turn(ctx1, pack_payload({1: "a"}), "t", 3),
+                encode_append_turn(ctx2, pack_payload({1: "b"}), "t", 3),
+            ]
+        )
+        assert len(results) == 2
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_append_encoded_turns_empty(self, mock_tcp_server):
+        """Empty batch is a no-op."""
+        client = CXDBTcpClient("127.0.0.1", mock_tcp_server.port)
+        await client.connect()
+        assert await client.append_encoded_turns([]) == []
+        await client.close()
+
     @pytest.mark.asyncio
     async def test_append_turn_not_connected(self):
         """append_turn without connect raises ConnectionError."""
@@ -457,6 +674,147 @@ class TestClientAppendTurn:
             )
 
 
+async def _start_scripted_server(handle_requests):
+    """Start a server that answers HELLO, then hands the stream to handle_requests."""
+
+    async def read_frame(reader):
+        header = await reader.readexactly(FRAME_HEADER_SIZE)
+        payload_len, msg_type, _, request_id = struct.unpack("<IHHQ", header)
+        return msg_type, request_id, await reader.readexactly(payload_len)
+
+    async def handle(reader, writer):
+        _, request_id, _ = await read_frame(reader)
+        writer.write(encode_frame(MSG_HELLO, request_id, struct.pack("<QH", 1, 1)))
+        await handle_requests(read_frame, reader, writer)
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+class TestPipelining:
+    @pytest.mark.asyncio
+    async def test_responses_matched_by_request_id(self):
+        """Out-of-order responses resolve the request they answer."""
+
+        async def reply_in_reverse(read_frame, reader, writer):
+            requests = [await read_frame(reader) for _ in range(2)]
+            for _, request_id, _ in reversed(requests):
+                # Encode the request ID into the context ID to check matching
+                payload = struct.pack("<QQI", 1000 + request_id, 0, 0)
+                writer.write(encode_frame(MSG_CTX_CREATE, request_id, payload))
+            await writer.drain()
+
+        server, port = await _start_scripted_server(reply_in_reverse)
+        client = CXDBTcpClient("127.0.0.1", port)
+        await client.connect()
+        first, second = await asyncio.gather(
+            client.create_context(), client.create_context()
+        )
+        assert (first[0], second[0]) == (1002, 1003)
+        await client.close()
+        server.close()
+        await server.wait_closed()
+
+    @pytest.mark.asyncio
+    async def test_error_frame_raises_protocol_error(self):
+        """A MSG_ERROR response fails only the request it answers."""
+
+        async def reply_error(read_frame, reader, writer):
+            _, request_id, _ = await read_frame(reader)
+            detail = b"context not found"
+            payload = struct.pack("<II", 404, len(detail)) + detail
+            writer.write(encode_frame(MSG_ERROR, request_id, payload))
+            await writer.drain()
+            await reader.read()
+
+        server, port = await _start_scripted_server(reply_error)
+        client = CXDBTcpClient("127.0.0.1", port)
+        await client.connect()
+        with pytest.raises(CXDBProtocolError, match="code=404"):
+            await client.get_head(1)
+        assert client.connected
+        await client.close()
+        server.close()
+        await server.wait_closed()
+
+    @pytest.mark.asyncio
+    async def test_frame_larger_than_receive_buffer(self):
+        """A response bigger than the receive buffer, sent in pieces, is reassembled."""
+        detail = b"x" * (3 * protocol_mod._RX_BUFFER_SIZE)
+
+        async def reply_in_pieces(read_frame, reader, writer):
+            (_, first_id, _), (_, second_id, _) = [
+                await read_frame(reader) for _ in range(2)
+            ]
+            payload = struct.pack("<II", 500, len(detail)) + detail
+            frames = encode_frame(MSG_ERROR, first_id, payload) + encode_frame(
+                MSG_GET_HEAD, second_id, struct.pack("<QI", 42, 7)
+            )
+            for start in range(0, len(frames), 50_000):
+                writer.write(frames[start : start + 50_000])
+                await writer.drain()
+                await asyncio.sleep(0.01)
+            await reader.read()
+
+        server, port = await _start_scripted_server(reply_in_pieces)
+        client = CXDBTcpClient("127.0.0.1", port)
+        await client.connect()
+        error, head = await asyncio.gather(
+            client.get_head(1), client.get_head(2), return_exceptions=True
+        )
+        assert isinstance(error, CXDBProtocolError)
+        assert str(error).endswith("x" * 100)
+        assert head == (42, 7)
+        await client.close()
+        server.close()
+        await server.wait_closed()
+
+    @pytest.mark.asyncio
+    async def test_connection_loss_fails_pending_requests(self):
+        """In-flight requests fail with ConnectionError when the server hangs up."""
+
+        async def hang_up(read_frame, reader, writer):
+            await read_frame(reader)
+
+        server, port = await _start_scripted_server(hang_up)
+        client = CXDBTcpClient("127.0.0.1", port)
+        await client.connect()
+        with pytest.raises(ConnectionError):
+            await client.create_context()
+        assert not client.connected
+        await client.close()
+        server.close()
+        await server.wait_closed()
+
+    @pytest.mark.asyncio
+    async def test_backpressure_times_out_every_caller(self):
+        """Concurrent writers blocked on a peer that stops reading all time out."""
+        stop_reading = asyncio.Event()
+
+        async def never_read(read_frame, reader, writer):
+            await stop_reading.wait()
+
+        server, port = await _start_scripted_server(never_read)
+        client = CXDBTcpClient("127.0.0.1", port, timeout=0.5)
+        await client.connect()
+        payload = b"x" * (16 << 20)
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                client.append_encoded_turns([payload]),
+                client.append_encoded_turns([payload]),
+                return_exceptions=True,
+            ),
+            timeout=5,
+        )
+        assert all(isinstance(result, ConnectionError) for result in results)
+        assert not client._protocol._drain_waiters
+        stop_reading.set()
+        await client.close()
+        server.close()
+        await server.wait_closed()
+
+
 class TestErrorResponseParsing:
     def test_error_response_parsed_correctly(self):
         """Error frames with binary prefix are parsed correctly."""
@@ -1,5 +1,6 @@
 """Tests for registry bundle and schema helpers."""
 
+import hashlib
 import json
 import time
 
@@ -10,7 +11,12 @@ import pytest
 from amplifier_module_hooks_cxdb_events.schema import (
     _BUNDLE_ID,
     _BUNDLE_PATH,
+    PROV_TAG_ENV,
+    PROV_TAG_SERVICE_INSTANCE_ID,
+    _make_item_id,
+    _process_provenance,
     build_event_as_system_item,
+    build_provenance,
     calculate_payload_bytes,
     extract_agent_name,
     load_bundle_json,
@@ -212,6 +218,38 @@ class TestPublishRegistryBundle:
         body = json.loads(request.content)
         assert "types" in body
 
+    @pytest.mark.asyncio
+    async def test_publish_reuses_given_client(self, httpx_mock):
+        """A caller-provided client is used for every publish and left open."""
+        httpx_mock.add_response(method="PUT", status_code=201)
+        httpx_mock.add_response(method="PUT", status_code=204)
+        async with httpx.AsyncClient() as client:
+            assert await publish_registry_bundle("localhost", 9010, client)
+            assert await publish_registry_bundle("otherhost", 9010, client)
+            assert not client.is_closed
+        assert len(httpx_mock.get_requests()) == 2
+
+
+class TestBuildProvenance:
+    def test_env_layers_per_context_fields(self):
+        """Per-context env vars are added without touching the shared process env."""
+        process_env = dict(_process_provenance().get(PROV_TAG_ENV, {}))
+        prov = build_provenance("sess-1", agent_name="explorer", bundle_name="b")
+        env = prov[PROV_TAG_ENV]
+        assert env["AMPLIFIER_SESSION"] == "sess-1"
+        assert env["AMPLIFIER_AGENT"] == "explorer"
+        assert env["AMPLIFIER_BUNDLE"] == "b"
+        assert _process_provenance().get(PROV_TAG_ENV, {}) == process_env
+
+    def test_process_fields_shared_across_calls(self):
+        """Process-level fields come from one capture per process."""
+        first = build_provenance("sess-1")
+        second = build_provenance("sess-2")
+        instance_id = PROV_TAG_SERVICE_INSTANCE_ID
+        assert first[instance_id] == second[instance_id]
+        assert second[PROV_TAG_ENV]["AMPLIFIER_SESSION"] == "sess-2"
+        assert "AMPLIFIER_AGENT" not in second[PROV_TAG_ENV]
+
 
 class TestExtractAgentName:
     def test_child_session_simple(self):
@@ -264,6 +302,14 @@ class TestBuildEventAsSystemItem:
         assert isinstance(item[3], int) and item[3] > 0  # timestamp
         assert isinstance(item[4], str) and len(item[4]) > 0  # id
 
+    def test_items_do_not_share_state(self):
+        """Each item is a fresh dict; building one never alters another."""
+        first = build_event_as_system_item("tool:pre", {}, "s", None, None)
+        second = build_event_as_system_item("tool:post", {}, "s", None, None)
+        assert first is not second
+        assert list(first) == [1, 2, 3, 4, 12]
+        assert (first[12][2], second[12][2]) == ("tool:pre", "tool:post")
+
     def test_system_subtree_has_event_name_as_title(self):
         """SystemMessage title is the event name."""
         item = build_event_as_system_item(
@@ -307,6 +353,26 @@ class TestBuildEventAsSystemItem:
         other_item = build_event_as_system_item("prompt:submit", {}, "s", None, None)
         assert other_item[12][1] == "info"
 
+    def test_header_cached_per_event_and_agent(self):
+        """Cached kind/title stays correct when the same event alternates agents."""
+        first = build_event_as_system_item("tool:post", {}, "s", None, "agent-a")
+        second = build_event_as_system_item("tool:post", {}, "s", None, None)
+        third = build_event_as_system_item("tool:post", {}, "s", None, "agent-a")
+        assert first[12][2] == "[agent-a] tool:post"
+        assert second[12][2] == "tool:post"
+        assert third[12] == first[12]
+        assert third[12] is not first[12]
+
+    def test_item_id_is_blake2b_of_session_label_ts(self):
+        """Item IDs hash "session:label:ts", independent of hasher reuse."""
+        for session_id in ("abc-123", "def-456", "abc-123"):
+            expected = hashlib.blake2b(
+                f"{session_id}:tool:post:42".encode(), digest_size=12
+            )
+            assert _make_item_id(session_id, "tool:post", 42) == (
+                expected.hexdigest()
+            )
+
     def test_data_serialized_into_content(self):
         """Event data is JSON-serialized into the system content field."""
         item = build_event_as_system_item(
@@ -1,5 +1,7 @@
 """Tests for TurnAccumulator - conversation turn buffering and flush."""
 
+from collections import OrderedDict
+
 from amplifier_module_hooks_cxdb_events.turns import (
     AccumulatedTurn,
     ToolCallRecord,
@@ -131,6 +133,47 @@ class TestTurnAccumulatorToolCalls:
         turn = acc.flush()
         assert len(turn.tool_calls[0].input_summary) <= 200
 
+    def test_large_tool_result_bounded(self):
+        """Large container results are capped without losing their start."""
+        acc = TurnAccumulator()
+        acc.on_tool_pre({"tool_name": "read", "tool_input": {"path": "big.txt"}})
+        acc.on_tool_post(
+            {"tool_name": "read", "result": {"output": "x" * 100_000, "ok": True}}
+        )
+        turn = acc.flush()
+        assert turn.tool_calls[0].input_summary == "{'path': 'big.txt'}"
+        result = turn.tool_calls[0].result
+        assert len(result) <= 500
+        assert result.startswith("{'output': 'xxx")
+
+    def test_short_tool_result_reads_as_str(self):
+        """Results that fit the cap are exactly str(), whatever their shape."""
+        results = [
+            {f"key{i}": i for i in range(10)},
+            [[[[[[[["deep"]]]]]]]],
+            {"text": "y" * 150, "n": 10**60},
+        ]
+        for result in results:
+            acc = TurnAccumulator()
+            acc.on_tool_pre({"tool_name": "t", "tool_input": {}})
+            acc.on_tool_post({"tool_name": "t", "result": result})
+            assert acc.flush().tool_calls[0].result == str(result)
+
+    def test_large_dict_subclass_result_bounded(self):
+        """Dict subclasses take the bounded path instead of a full repr()."""
+
+        class Payload(OrderedDict):
+            def __repr__(self):
+                raise AssertionError("full repr() should not be rendered")
+
+        acc = TurnAccumulator()
+        acc.on_tool_pre({"tool_name": "read", "tool_input": {"path": "big.txt"}})
+        result = Payload((f"k{i}", "x" * 10_000) for i in range(1000))
+        acc.on_tool_post({"tool_name": "read", "result": result})
+        turn = acc.flush()
+        assert len(turn.tool_calls[0].result) <= 500
+        assert turn.tool_calls[0].result.startswith("{'k0': 'xxx")
+
 
 class TestTurnAccumulatorMetrics:
     def test_basic_metrics(self):
@@ -202,6 +245,23 @@ class TestTurnAccumulatorMetrics:
         turn = acc.flush()
         assert turn.metrics["reasoning_tokens"] == 25
 
+    def test_usage_keys_counted_for_every_provider(self):
+        """Every usage key is read whatever the provider name says."""
+        usage = {
+            "input_tokens": 5,
+            "cache_read_input_tokens": 1000,
+            "cache_creation_input_tokens": 200,
+            "output_tokens": 500,
+            "completion_tokens_details": {"reasoning_tokens": 25},
+        }
+        for provider in ("anthropic", "openai", "other"):
+            acc = TurnAccumulator()
+            acc.on_provider_response({"usage": usage, "provider": provider})
+            metrics = acc._current.metrics
+            assert metrics["cache_creation_input_tokens"] == 200
+            assert metrics["total_input_tokens"] == 1205
+            assert metrics["reasoning_tokens"] == 25
+
     def test_no_usage_skips_metrics(self):
         """Missing usage dict means no metrics captured."""
         acc = TurnAccumulator()
@@ -314,6 +374,16 @@ class TestToConversationItems:
         assert assistant_turn[2][0][2] == "grep"  # ToolCallItem.name
         assert assistant_turn[2][0][4] == "complete"  # ToolCallItem.status
 
+    def test_items_do_not_share_state(self):
+        """Items are fresh dicts with tags in ascending order."""
+        acc = TurnAccumulator()
+        turn = AccumulatedTurn(user_prompt="Hi", assistant_text_blocks=["Hello"])
+        first = acc.to_conversation_items(turn)
+        second = acc.to_conversation_items(turn)
+        assert first[0] is not second[0] and first[1] is not second[1]
+        assert list(first[0]) == [1, 2, 3, 4, 10]
+        assert list(first[1]) == [1, 2, 3, 4, 11]
+
     def test_assistant_with_metrics(self):
         """Assistant turn includes metrics in AssistantTurn subtree (tag 11.4)."""
         acc = TurnAccumulator()
@@ -407,6 +477,29 @@ class TestToolCallIdMatching:
         turn = acc.flush()
         assert turn.tool_calls[0].has_result
 
+    def test_name_fallback_skips_calls_completed_by_id(self):
+        """A name-only tool:post completes the latest call still open."""
+        acc = TurnAccumulator()
+        for call_id in ("call_A", "call_B", "call_C"):
+            acc.on_tool_pre({"tool_name": "bash", "tool_call_id": call_id})
+        acc.on_tool_post({"tool_name": "bash", "tool_call_id": "call_C"})
+        acc.on_tool_post({"tool_name": "bash", "result": "by name"})
+        acc.on_tool_post({"tool_name": "bash", "tool_call_id": "call_B"})
+        acc.on_tool_post({"tool_name": "bash", "tool_call_id": "call_A"})
+        turn = acc.flush()
+        assert [tc.has_result for tc in turn.tool_calls] == [True, True, True]
+        assert turn.tool_calls[1].result == "by name"
+        # call_B was already completed by name, so its post fell back to call_A
+        assert turn.tool_calls[0].result is None
+
+    def test_call_index_reset_on_flush(self):
+        """A tool:post after flush does not complete calls from the old turn."""
+        acc = TurnAccumulator()
+        acc.on_tool_pre({"tool_name": "grep", "tool_call_id": "call_A"})
+        old_turn = acc.flush()
+        acc.on_tool_post({"tool_name": "grep", "tool_call_id": "call_A"})
+        assert not old_turn.tool_calls[0].has_result
+
 
 class TestDurationMs:
     def test_duration_ms_captured(self):
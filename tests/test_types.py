@@ -126,6 +126,12 @@ class TestGetBaseEvent:
         assert get_base_event("content_block:start") == "content_block:start"
         assert get_base_event("context:pre_compact") == "context:pre_compact"
 
+    def test_unmapped_events_classified_on_the_fly(self):
+        """Events outside EVENT_TYPE_MAP still have their suffix stripped."""
+        assert get_base_event("custom:thing:raw") == "custom:thing"
+        assert get_base_event("custom:thing:debug") == "custom:thing"
+        assert has_variants("custom:thing:raw") is False
+
 
 class TestHasVariants:
     def test_events_with_variants(self):
@@ -221,6 +227,22 @@ class TestVariantDeduplicator:
             assert dedup.should_process("session:start:debug") is False
             assert dedup.should_process("session:start") is False
 
+    def test_unregistered_variant_of_known_family(self):
+        """A variant seen only at runtime is decided against the precomputed map."""
+        events = ["session:start", "session:start:raw"]
+        dedup = VariantDeduplicator(known_events=events)
+        for _ in range(2):
+            assert dedup.should_process("session:start:debug") is False
+            assert dedup.should_process("session:start:raw") is True
+
+    def test_same_events_share_variant_map(self):
+        """Deduplicators for the same event set reuse one precomputed map."""
+        first = VariantDeduplicator(known_events=self.ALL_VARIANTS)
+        second = VariantDeduplicator(known_events=list(self.ALL_VARIANTS))
+        assert first._best_variant is second._best_variant
+        first.should_process("custom:event")
+        assert "custom:event" not in second._decisions
+
 
 class TestEventTypeMapCompleteness:
     def test_all_15_types_represented(self):